@@ -1,17 +1,53 @@
 # The "." here is a relative import; it specifies (replaced by) the current directory path it resides in when imported by another module
 # This allows other modules to get the full path to the imported objects (automatically prepends "my_utils")
-from .cleaners import clean_columns
-from .predictors import select_important_features, ExogArima, predict_churn
-from .dataframes import smart_drop, NumericalScaler, CategoricalEncoder, optimize_dtypes
-from .letsplot_pane import LetsPlotPane
-from .shap_calculator import get_shap_values
-from .tree_optimize import optimize_trees
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # eager imports for type checkers and IDEs only
+    from .cleaners import clean_columns, ColumnCleaner, clean_values
+    from .predictors import select_important_features, ExogArima, exog_arima_batch, predict_churn, predict_churn_batch, ChurnTracker
+    from .dataframes import smart_drop, NumericalScaler, CategoricalEncoder, optimize_dtypes, optimized_schema
+    from .pipeline import Pipeline
+    from .serialization import save_fitted, load_fitted
+    from .letsplot_pane import LetsPlotPane
+    from .shap_calculator import get_shap_values
+    from .tree_optimize import optimize_trees, CompiledForest
+
+# Maps every public object to the submodule defining it: submodules (and their heavy dependencies, e.g. sklearn, statsmodels or panel) are only
+# imported upon first accessing one of their objects, so that e.g. "from my_utils import clean_columns" doesn't pay for the rest
+_SUBMODULES: dict[str, str] = {
+    "clean_columns": ".cleaners", "ColumnCleaner": ".cleaners", "clean_values": ".cleaners",
+    "select_important_features": ".predictors", "ExogArima": ".predictors", "exog_arima_batch": ".predictors", "predict_churn": ".predictors",
+    "predict_churn_batch": ".predictors", "ChurnTracker": ".predictors",
+    "smart_drop": ".dataframes", "NumericalScaler": ".dataframes", "CategoricalEncoder": ".dataframes", "optimize_dtypes": ".dataframes",
+    "optimized_schema": ".dataframes",
+    "Pipeline": ".pipeline",
+    "save_fitted": ".serialization", "load_fitted": ".serialization",
+    "LetsPlotPane": ".letsplot_pane",
+    "get_shap_values": ".shap_calculator",
+    "optimize_trees": ".tree_optimize", "CompiledForest": ".tree_optimize",
+}
 
 # Defines the public API of the package, limiting what gets imported via "from my_utils import *" to elements in "__all__"
-__all__ = ("clean_columns",
-           "select_important_features", "ExogArima", "predict_churn",
-           'smart_drop', 'NumericalScaler', 'CategoricalEncoder', 'optimize_dtypes',
+__all__ = ("clean_columns", "ColumnCleaner", "clean_values",
+           "select_important_features", "ExogArima", "exog_arima_batch", "predict_churn", "predict_churn_batch", "ChurnTracker",
+           'smart_drop', 'NumericalScaler', 'CategoricalEncoder', 'optimize_dtypes', 'optimized_schema',
+           "Pipeline",
+           "save_fitted", "load_fitted",
            "LetsPlotPane",
            "get_shap_values",
-           "optimize_trees",
+           "optimize_trees", "CompiledForest",
            )
+
+
+def __getattr__(name: str):  # only called when "name" isn't found in the module's globals (PEP 562)
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_SUBMODULES[name], __name__), name)
+    globals()[name] = value  # cached: later accesses don't go through "__getattr__()" anymore
+    return value
+
+
+def __dir__() -> list[str]:  # the public API only, not this module's own imports (e.g. "import_module")
+    return sorted(_SUBMODULES)
@@ -1,6 +1,14 @@
 import re
+import polars as pl
+from functools import lru_cache
+from typing import Callable
 from unicodedata import normalize
 
+# "_split_strip_string()"'s patterns, compiled once: punctuation becomes spaces and quotes are dropped in a single "str.translate()" pass
+_PUNCTUATION_TABLE = str.maketrans({**dict.fromkeys("!()*+,-./:;<=>?[]^_{|}~", " "), **dict.fromkeys("'\"`", None)})
+_BOUNDARY_PATTERN = re.compile(r"([A-Z]+|[0-9]+|\W+)")
+_CAPITALIZED_PATTERN = re.compile(r"([A-Z][a-z]+)")
+
 
 def replace_values(name: str, mapping: dict[str, str]) -> str:
     """Replace specified string values in the given column name based on a dictionary mapping.
@@ -29,10 +37,9 @@ def _remove_accents(name: str) -> str:
 
 def _split_strip_string(string: str) -> list[str]:
     """Split the string into separate words and strip punctuation."""
-    string = re.sub(r"[!()*+,\-./:;<=>?[\]^_{|}~]", " ", string)
-    string = re.sub(r"[\'\"`]", "", string)
+    string = string.translate(_PUNCTUATION_TABLE)
 
-    return re.sub(r"([A-Z][a-z]+)", r" \1", re.sub(r"([A-Z]+|[0-9]+|\W+)", r" \1", string)).split()
+    return _CAPITALIZED_PATTERN.sub(r" \1", _BOUNDARY_PATTERN.sub(r" \1", string)).split()
 
 
 def convert_case(name: str, case: str) -> str:
@@ -124,3 +131,150 @@ def clean_columns(
     col_input = [convert_case(ele, case) for ele in col_input]
 
     return rename_duplicates(col_input, case)
+
+
+def _can_overlap(a: str, b: str) -> bool:
+    """Whether occurrences of the strings a and b can overlap within some text."""
+    return a in b or b in a or any(a.endswith(b[:k]) for k in range(1, len(b))) or any(b.endswith(a[:k]) for k in range(1, len(a)))
+
+
+def _replacements(mapping: dict[str, str]) -> list[tuple[str, str]]:
+    """Return the (old value, new value) pairs substituted by "replace_values()"."""
+    return [(old_value, new_value if old_value.isalnum() and new_value.isalnum() else f"_{new_value}_") for old_value, new_value in mapping.items()]
+
+
+def _independent(replacements: list[tuple[str, str]]) -> bool:
+    """Whether a single left-to-right scan matching all the old values gives the same output as substituting them sequentially.
+
+    It does if the old values are literals whose matches can't overlap, and if no replacement can create (or destroy) the match of a later value.
+    """
+    olds, news = [old.lower() for old, _ in replacements], [new.lower() for _, new in replacements]
+    return all(re.escape(old) == old and "\\" not in new for old, new in replacements) and not any(
+        _can_overlap(olds[i], olds[j]) or _can_overlap(news[i], olds[j]) for i in range(len(olds)) for j in range(i + 1, len(olds))
+    )
+
+
+def _compile_replace(mapping: dict[str, str]) -> Callable[[str], str]:
+    """Compile a "replace_values()" mapping into a single function, matching all of its (old) values with one alternation regex when possible."""
+    replacements: list[tuple[str, str]] = _replacements(mapping)
+    if _independent(replacements):
+        pattern = re.compile("|".join(f"({old})" for old, _ in replacements), flags=re.IGNORECASE)
+        return lambda name: pattern.sub(lambda match: replacements[match.lastindex - 1][1], name)
+
+    patterns = [(re.compile(old, flags=re.IGNORECASE), new) for old, new in replacements]
+
+    def replace_sequentially(name: str) -> str:
+        for pattern, new in patterns:
+            name = pattern.sub(new, name)
+        return name
+
+    return replace_sequentially
+
+
+class ColumnCleaner:
+    """A reusable "clean_columns()" for wide and repeated schemas, giving the same output.
+
+    The replace mapping is compiled once (into a single alternation regex whenever its values don't interact), and every cleaned name is memoized
+    in an LRU cache, so the headers shared by many files are only cleaned once.
+
+    Args:
+        case (str, optional): The desired case style of the column names. Defaults to "snake".
+        replace (Dict[str, str], optional): Values (parts) to replace from the column names. Defaults to None.
+        remove_accents (bool, optional): If True, strip accents from the column names. Defaults to True.
+        cache_size (int, optional): The maximum number of memoized names (None for unbounded). Defaults to 65,536.
+    """
+    def __init__(
+        self,
+        case: str = "snake",
+        replace: dict[str, str] | None = None,
+        remove_accents: bool = True,
+        cache_size: int | None = 65_536,
+    ):
+        self.case = case
+        self.replace = replace
+        self.remove_accents = remove_accents
+        self._replace: Callable[[str], str] | None = _compile_replace(replace) if replace else None
+        self.clean_name: Callable[[str], str] = lru_cache(maxsize=cache_size)(self._clean_name)
+
+    def _clean_name(self, name: str) -> str:
+        if self._replace:
+            name = self._replace(name)
+
+        if self.remove_accents:
+            name = _remove_accents(name)
+
+        return convert_case(name, self.case)
+
+    def __call__(self, col_input: str | list[str] | tuple[str, ...]) -> str | list[str]:
+        if isinstance(col_input, str):
+            return self.clean_name(col_input)
+
+        return rename_duplicates([self.clean_name(ele) for ele in col_input], self.case)
+
+
+def _capitalize_expr(expr: pl.Expr) -> pl.Expr:
+    """Polars equivalent of "str.capitalize()"."""
+    return expr.str.slice(0, 1).str.to_titlecase() + expr.str.slice(1).str.to_lowercase()  # titlecase, as "ß".capitalize() is "Ss", not "SS"
+
+
+def _clean_values_expr(expr: pl.Expr, case: str, replace: dict[str, str] | None, remove_accents: bool) -> pl.Expr:
+    """Polars (native string kernels) equivalent of "clean_columns()" on a single name."""
+    if replace:
+        replacements: list[tuple[str, str]] = _replacements(replace)
+        # "ascii_case_insensitive" only folds ASCII letters, unlike "re.IGNORECASE" ==> non-ASCII values go through the "(?i)" regexes
+        if _independent(replacements) and all(old.isascii() for old, _ in replacements):
+            expr = expr.str.replace_many([old for old, _ in replacements], [new for _, new in replacements], ascii_case_insensitive=True)
+        else:
+            for old, new in replacements:
+                expr = expr.str.replace_all(f"(?i){old}", new.replace("$", "$$"))
+
+    if remove_accents:
+        expr = expr.str.normalize("NFD").str.replace_all(r"[^\x00-\x7F]", "")
+
+    if case not in {"snake", "kebab", "camel", "pascal", "const"}:
+        return expr
+
+    # "_split_strip_string()"
+    expr = expr.str.replace_all(r"[!()*+,\-./:;<=>?\[\]^_{|}~]", " ").str.replace_all(r"['\"`]", "")
+    expr = expr.str.replace_all(r"([A-Z]+|[0-9]+|\W+)", " ${1}").str.replace_all(r"([A-Z][a-z]+)", " ${1}")
+    words: pl.Expr = expr.str.extract_all(r"\S+")
+
+    if case == "snake":
+        return words.list.join("_").str.to_lowercase()
+    if case == "kebab":
+        return words.list.join("-").str.to_lowercase()
+    if case == "const":
+        return words.list.join("_").str.to_uppercase()
+
+    capitalized: pl.Expr = words.list.eval(_capitalize_expr(pl.element()))
+    if case == "pascal":
+        return capitalized.list.join("")
+    return pl.concat_str(words.list.first().str.to_lowercase(), capitalized.list.slice(1).list.join(""), ignore_nulls=True)  # camel
+
+
+def clean_values(
+    expr: pl.Expr | str,
+    case: str = "snake",
+    replace: dict[str, str] | None = None,
+    remove_accents: bool = True,
+    deduplicate: bool = True,
+) -> pl.Expr:
+    """Clean string (or categorical) values the way "clean_columns()" cleans column names, as a Polars expression.
+
+    Built from native Polars string kernels only, so it runs within (lazy or streaming) plans without calling back into Python, e.g.
+    "df.with_columns(clean_values("city", case="snake"))". Duplicated values aren't renamed.
+
+    Args:
+        expr (pl.Expr or str, required): The expression (or column name) holding the values to be cleaned.
+        case (str, optional): The desired case style of the values. Defaults to "snake".
+        replace (Dict[str, str], optional): Values (parts) to replace from the values. Defaults to None.
+        remove_accents (bool, optional): If True, strip accents from the values. Defaults to True.
+        deduplicate (bool, optional): If True, only clean each distinct value once, then map the column onto the cleaned values; best for
+            repetitive (categorical-like) data, whereas False keeps the expression elementwise. Defaults to True.
+    """
+    expr = (pl.col(expr) if isinstance(expr, str) else expr).cast(pl.String)
+    if not deduplicate:
+        return _clean_values_expr(expr, case, replace, remove_accents)
+
+    distinct: pl.Expr = expr.unique(maintain_order=True)
+    return expr.replace_strict(distinct, _clean_values_expr(distinct, case, replace, remove_accents), return_dtype=pl.String)
@@ -1,7 +1,25 @@
 from vertica_python import connect, Connection
+from vertica_python.datatypes import VerticaType
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dataframes import optimize_dtypes
 from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from contextlib import closing, contextmanager
+from hashlib import sha256
+from os.path import join, getsize, exists
+import os
+import re
+import json
+import time
+from queue import LifoQueue, Empty
+from threading import Lock
+from typing import Callable, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # e.g. Windows: the cache's index is then only locked within the process
+    fcntl = None
 
 
 def free_namespace(namespace: dict | None = None) -> None:
@@ -40,21 +58,28 @@ def get_connection_config(path_to_config_file: str = "vertica_config.env") -> di
         return {k: v if not v.isdigit() else int(v) for k, v in env_lines}
 
 
+_conn: Connection | None = None  # the module's shared connection (use "VerticaPool" for concurrent queries instead)
+_conn_lock = Lock()
+# A single long-lived executor: exiting a "with ThreadPoolExecutor()" block waits for the (possibly hung) reconnect thread, defeating the timeout
+_reconnect_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vertica_reconnect")
+
+
 def get_vertica_connection(*, force_new: bool = False, **kwargs) -> Connection:
     # The "*" is there just to force the args after it to be passed as kwargs
-    conn: Connection = globals().get("conn")
+    global _conn
 
-    if conn:
-        if force_new:
-            return vertica_connect(**kwargs)
-        if conn.opened():
-            print("Connection already open.")
-            return conn
+    if force_new:
+        return vertica_connect(**kwargs)
 
-        reconnect_vertica(conn)
-        return conn
+    with _conn_lock:  # prevents concurrent callers from opening (or resetting) the shared connection twice
+        if _conn is None:
+            _conn = vertica_connect(**kwargs)
+        elif _conn.opened():
+            print("Connection already open.")
+        else:
+            reconnect_vertica(_conn)
 
-    return vertica_connect(**kwargs)
+        return _conn
 
 
 def vertica_connect(**kwargs):
@@ -79,35 +104,506 @@ def vertica_connect(**kwargs):
 
 def reconnect_vertica(connection: Connection) -> None:
     print("Reconnecting...")
-    with ThreadPoolExecutor(max_workers=1) as executor:  # context manager will automatically close and cleanup spawned thread(s)
-        # Threads in Python are only useful for external tasks (I/O bound operations rather than CPU bound), as processes **within** Python are single-threaded
-        # due to GIL ==> only one thread of execution can run instructions at a time in a Python process.
-        future = executor.submit(connection.reset_connection)  # schedule the callable to be executed (in the future)
-        try:
-            future.result(timeout=120)  # wait for two minutes
-        except TimeoutError:
-            print(f"Reconnection attempt timed out after 2 minutes.")
-            future.cancel()
-            raise
-        except Exception as e:
-            print(f"Reconnection failed: {e}.")
-            raise
-        else:  # if no exception occurs
-            print("Reconnected successfully!")
+    # Threads in Python are only useful for external tasks (I/O bound operations rather than CPU bound), as processes **within** Python are single-threaded
+    # due to GIL ==> only one thread of execution can run instructions at a time in a Python process.
+    future = _reconnect_executor.submit(connection.reset_connection)  # schedule the callable to be executed (in the future)
+    try:
+        future.result(timeout=120)  # wait for two minutes
+    except TimeoutError:
+        print(f"Reconnection attempt timed out after 2 minutes.")
+        future.cancel()
+        raise
+    except Exception as e:
+        print(f"Reconnection failed: {e}.")
+        raise
+    else:  # if no exception occurs
+        print("Reconnected successfully!")
+
+
+def _numeric_dtype(precision: int | None, scale: int | None) -> pl.DataType:
+    if precision is None:
+        return pl.Float64()
+    if not scale:  # integral NUMERIC(p, 0): pick the smallest integer type holding p digits
+        for max_digits, int_type in ((2, pl.Int8), (4, pl.Int16), (9, pl.Int32), (18, pl.Int64)):
+            if precision <= max_digits:
+                return int_type()
+        return pl.Decimal(precision, 0) if precision <= 38 else pl.Float64()  # Polars decimals hold at most 38 digits (Vertica's, up to 1024)
+    return pl.Float32() if precision <= 6 else pl.Float64()  # Float32 round-trips up to 6 significant decimal digits
+
+
+# Maps Vertica's type codes to Polars dtypes given the column's (precision, scale), as reported in "cursor.description"
+_VERTICA_DTYPES: dict[int, Callable[[int | None, int | None], pl.DataType]] = {
+    VerticaType.BOOL: lambda precision, scale: pl.Boolean(),
+    VerticaType.INT8: lambda precision, scale: pl.Int64(),  # Vertica integers are always 64-bit
+    VerticaType.FLOAT8: lambda precision, scale: pl.Float64(),
+    VerticaType.NUMERIC: _numeric_dtype,
+    VerticaType.CHAR: lambda precision, scale: pl.String(),
+    VerticaType.VARCHAR: lambda precision, scale: pl.String(),
+    VerticaType.LONGVARCHAR: lambda precision, scale: pl.String(),
+    VerticaType.UUID: lambda precision, scale: pl.String(),
+    VerticaType.DATE: lambda precision, scale: pl.Date(),
+    VerticaType.TIME: lambda precision, scale: pl.Time(),
+    VerticaType.TIMESTAMP: lambda precision, scale: pl.Datetime("us"),
+    VerticaType.TIMESTAMPTZ: lambda precision, scale: pl.Datetime("us", "UTC"),
+    VerticaType.INTERVAL: lambda precision, scale: pl.Duration("us"),
+    VerticaType.BINARY: lambda precision, scale: pl.Binary(),
+    VerticaType.VARBINARY: lambda precision, scale: pl.Binary(),
+    VerticaType.LONGVARBINARY: lambda precision, scale: pl.Binary(),
+}
+
+
+def description_schema(description) -> dict[str, pl.DataType | None]:
+    """
+    Maps a cursor's "description" (name, type_code, display_size, internal_size, precision, scale, null_ok) to the columns' target Polars dtypes.
+    Columns of unmapped types (e.g. Vertica's complex types or non-Vertica type codes) map to None, i.e. their dtype gets inferred.
+    """
+    schema: dict[str, pl.DataType | None] = {}
+    for col in description:
+        to_dtype = _VERTICA_DTYPES.get(col[1])
+        schema[col[0]] = to_dtype(col[4], col[5]) if to_dtype else None
+    return schema
+
+
+def rows_to_frame(rows: list[tuple], description) -> pl.DataFrame:
+    """
+    Decodes fetched rows straight into typed columns using the cursor's "description", skipping the schema inference scan and the re-cast pass.
+    """
+    schema = description_schema(description)
+    columns = zip(*rows) if rows else (() for _ in schema)  # C-level transpose of the rows into column tuples
+    series: list[pl.Series] = []
+    for col, values in zip(description, columns):
+        if col[1] == VerticaType.UUID:
+            values = [value if value is None else str(value) for value in values]
+        # Non-strict, so that e.g. the Decimals of integral NUMERIC columns convert; values that fail to convert would silently become nulls though
+        column = pl.Series(col[0], values, dtype=schema[col[0]], strict=False)
+        if column.null_count() != values.count(None):
+            value = next(value for value, is_null in zip(values, column.is_null()) if is_null and value is not None)
+            raise TypeError(f"Column {col[0]!r} holds a value of type {type(value).__name__} ({value!r}) that cannot be converted to {column.dtype}.")
+        series.append(column)
+    return pl.DataFrame(series)
 
 
-def fetch_data(query: str, conn: Connection, optimize_df: bool = True, auto_reconnect: bool = True) -> pl.DataFrame:
+def fetch_data(query: str, conn: Connection, optimize_df: bool = True, auto_reconnect: bool = True, typed: bool = False) -> pl.DataFrame:
     # Each query session is independent from one another, hence temp tables and session variables get reset every time
     # "use_prepared_statements=True" is efficient when executing the same query multiple times with different parameter (?) values
-    if not conn.opened() and auto_reconnect:
+    # "typed=True" decodes the columns using the types reported by the database (see "rows_to_frame()"), instead of inferring then optimizing them
+    if auto_reconnect and not conn.opened():
         reconnect_vertica(conn)
-    with conn.cursor() as cursor:
+    with closing(conn.cursor()) as cursor:
         # or we can use: "pl.read_database(query, conn, infer_schema_length=None)"
         cursor.execute(query)
-        df = pl.DataFrame(cursor.fetchall(), orient="row", schema=(col.name for col in cursor.description), infer_schema_length=None)
+        if typed:
+            return rows_to_frame(cursor.fetchall(), cursor.description)
+        df = pl.DataFrame(cursor.fetchall(), orient="row", schema=[col[0] for col in cursor.description], infer_schema_length=None)
         return optimize_dtypes(df, ignore_types=str) if optimize_df else df
 
 
+class VerticaPool:
+    """
+    A thread-safe pool of connections that can be borrowed concurrently by several worker threads.
+
+    Parameters
+    ----------
+    min_size
+        The number of connections opened upfront (and kept open).
+    max_size
+        The maximum number of connections open at once; borrowers block (up to "timeout" seconds) while all of them are in use.
+    warmup_queries
+        Queries executed once per connection, right after it's opened.
+    health_check_query
+        Query executed every time a connection is borrowed; connections failing it are closed and replaced by new ones.
+        If None, only the connection's ".opened()" status (when available) is checked.
+    connect_fn
+        The factory opening new connections, called with "conn_kwargs" (any DB-API 2.0 connect function works).
+    """
+    def __init__(
+            self,
+            min_size: int = 1,
+            max_size: int = 8,
+            *,
+            warmup_queries: Iterable[str] = ("SELECT CURRENT_DATE();",),
+            health_check_query: str | None = "SELECT 1;",
+            timeout: float = 120,
+            connect_fn: Callable[..., Connection] = connect,
+            **conn_kwargs,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Expected 0 <= min_size <= max_size and max_size >= 1")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.warmup_queries = tuple(warmup_queries)
+        self.health_check_query = health_check_query
+        self.timeout = timeout
+        self._connect_fn = connect_fn
+        self._conn_kwargs = conn_kwargs
+        self._idle: LifoQueue = LifoQueue()  # LIFO keeps reusing the warmest connections, letting the others idle
+        self._size = 0  # number of open connections (idle + borrowed)
+        self._lock = Lock()
+        self._closed = False
+
+        for _ in range(min_size):
+            self._reserve()
+            self._idle.put(self._open())
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"This {type(self).__name__} is closed.")
+            if self._size >= self.max_size:
+                return False
+            self._size += 1
+            return True
+
+    def _open(self) -> Connection:
+        try:
+            conn = self._connect_fn(**self._conn_kwargs)
+            with closing(conn.cursor()) as cursor:
+                for query in self.warmup_queries:
+                    cursor.execute(query)
+                    cursor.fetchall()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+        return conn
+
+    def _discard(self, conn: Connection) -> None:
+        with self._lock:
+            self._size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn: Connection) -> bool:
+        try:
+            if hasattr(conn, "opened") and not conn.opened():
+                return False
+            if self.health_check_query:
+                with closing(conn.cursor()) as cursor:
+                    cursor.execute(self.health_check_query)
+                    cursor.fetchall()
+        except Exception:
+            return False
+        return True
+
+    def acquire(self, timeout: float | None = None) -> Connection:
+        timeout = self.timeout if timeout is None else timeout
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                if self._reserve():
+                    return self._open()  # new connections were just warmed up, so no need to check them
+                try:
+                    conn = self._idle.get(timeout=timeout)
+                except Empty:
+                    raise TimeoutError(f"No connection became available within {timeout} seconds.") from None
+
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)  # dead connection ==> free its slot and loop again to replace it
+
+    def release(self, conn: Connection) -> None:
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[Connection]:
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def fetch(self, query: str, optimize_df: bool = True) -> pl.DataFrame:
+        with self.connection() as conn:
+            return fetch_data(query, conn, optimize_df, auto_reconnect=False)
+
+    def close(self) -> None:
+        """Closes the idle connections; connections still borrowed are closed once released."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Empty:
+                break
+
+    def __enter__(self) -> "VerticaPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def fetch_many(queries: Iterable[str], pool: VerticaPool, optimize_df: bool = True) -> list[pl.DataFrame]:
+    """
+    Runs independent queries in parallel (one borrowed connection each) and returns their frames in the same order as "queries".
+    """
+    with ThreadPoolExecutor(max_workers=pool.max_size) as executor:
+        return list(executor.map(lambda query: pool.fetch(query, optimize_df), queries))
+
+
+_SCHEMA_LOOKAHEAD = 10  # batches "fetch_batches()" may hold back to infer the dtype of columns that are null in the first one
+
+
+def _supertype(left: pl.DataType, right: pl.DataType) -> pl.DataType | None:
+    # The narrowest dtype both batch dtypes cast into without losing values (None if there's none, e.g. integers and strings)
+    if left == right or right == pl.Null:
+        return left
+    if left == pl.Null:
+        return right
+    if {left, right} == {pl.Int64, pl.Float64}:
+        return pl.Float64
+    if left.is_decimal() and right.is_decimal():
+        scale = max(left.scale, right.scale)
+        precision = max(left.precision - left.scale, right.precision - right.scale) + scale
+        return pl.Decimal(precision, scale) if precision <= 38 else None
+    return None
+
+
+def fetch_batches(
+        query: str,
+        conn,
+        batch_size: int = 100_000,
+        *,
+        as_arrow: bool = False,
+        typed: bool = False,
+        schema_overrides: dict[str, pl.DataType] | None = None,
+) -> Iterator[pl.DataFrame | pa.RecordBatch]:
+    """
+    Streams the result of a query in bounded "fetchmany()" batches, so at most "batch_size" rows are ever held as Python objects.
+
+    Parameters
+    ----------
+    query
+        The SQL query to execute.
+    conn
+        Any DB-API 2.0 connection (e.g. a Vertica or a sqlite3 connection).
+    batch_size
+        The number of rows fetched (and yielded) per batch.
+    as_arrow
+        Whether to yield Arrow record batches instead of Polars dataframes.
+    typed
+        Whether to decode the batches using the types reported in "cursor.description" (see "rows_to_frame()").
+    schema_overrides
+        Dtypes to impose on some of the columns. The remaining dtypes are inferred from the first batch, and every following batch is cast to that
+        same schema. Columns that are entirely null in it take the type reported in "cursor.description"; failing that (e.g. with sqlite), up to
+        "_SCHEMA_LOOKAHEAD" more batches are fetched ahead to infer it, and columns that remain null default to "pl.String". A later batch
+        whose values don't fit that schema losslessly (e.g. floats in a column inferred as integers) raises a TypeError rather than being cast.
+    """
+    with closing(conn.cursor()) as cursor:  # DB-API cursors aren't required to be context managers themselves
+        cursor.execute(query)
+        columns: list[str] = [col[0] for col in cursor.description]
+        described: dict[str, pl.DataType | None] = description_schema(cursor.description)
+        schema: dict[str, pl.DataType] | None = None
+        pending: list[pl.DataFrame] = []  # the batches held back until every column's dtype is known
+
+        def resolve_schema(final: bool) -> dict[str, pl.DataType] | None:
+            resolved: dict[str, pl.DataType] = {}
+            for name in columns:
+                dtype = pl.Null
+                for df in pending:
+                    if (dtype := _supertype(dtype, df.schema[name])) is None:
+                        raise TypeError(f"Column {name!r} holds incompatible dtypes across batches ({', '.join(map(str, {df.schema[name] for df in pending}))}); "
+                                        f'pass its dtype through "schema_overrides" (or use "typed=True").')
+                dtype = described[name] if dtype == pl.Null else dtype
+                if dtype is None and not final:
+                    return None
+                resolved[name] = dtype or pl.String
+            return resolved | (schema_overrides or {})
+
+        def emit(frames: list[pl.DataFrame]) -> Iterator[pl.DataFrame | pa.RecordBatch]:
+            for frame in frames:
+                for name, dtype in frame.schema.items():
+                    if _supertype(dtype, schema[name]) != schema[name]:
+                        raise TypeError(f"Column {name!r} was inferred as {schema[name]} from the first batch(es), but a later batch holds {dtype} "
+                                        f'values; pass its dtype through "schema_overrides" (or use "typed=True").')
+                frame = frame.cast(schema)
+                if as_arrow:
+                    yield from frame.rechunk().to_arrow().to_batches()
+                else:
+                    yield frame
+
+        while rows := cursor.fetchmany(batch_size):
+            if typed:
+                df = rows_to_frame(rows, cursor.description)
+            else:
+                # Every batch gets its own inference, checked against the stream's schema rather than forced into it
+                df = pl.DataFrame(rows, orient="row", schema=columns, schema_overrides=schema_overrides, infer_schema_length=None)
+            del rows  # release the Python tuples before the next round trip
+            if schema is None:
+                pending.append(df)
+                if (schema := resolve_schema(final=len(pending) > _SCHEMA_LOOKAHEAD)) is None:
+                    continue
+            batches, pending = pending or [df], []
+            yield from emit(batches)
+
+        if pending:  # the stream ended while columns were still null-only
+            schema = resolve_schema(final=True)
+            yield from emit(pending)
+
+
+def fetch_to_parquet(query: str, conn, save_parquet_path: str, batch_size: int = 100_000, **kwargs) -> int:
+    """
+    Writes the result of a query straight into a parquet file (one row group per batch), so extracts of any size run in constant memory.
+    Extra keyword arguments are passed on to "fetch_batches()". Returns the number of rows written (no file is created for empty results).
+    """
+    num_rows = 0
+    writer: pq.ParquetWriter | None = None
+    try:
+        for batch in fetch_batches(query, conn, batch_size, as_arrow=True, **kwargs):
+            if writer is None:
+                writer = pq.ParquetWriter(save_parquet_path, batch.schema, compression="zstd")
+            writer.write_batch(batch)
+            num_rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return num_rows
+
+
+class QueryCache:
+    """
+    An opt-in, on-disk cache of "fetch_data()" results stored as (dtype-optimized) parquet files.
+
+    Entries are keyed on the normalized query text, the connection's parameters and the "fetch_data()" options, expire after their TTL, and the
+    least recently used ones are evicted whenever the cache grows beyond "max_bytes". Hits are read into memory (while the index is locked) rather
+    than scanned, since a later refresh, expiry or eviction unlinks the file an unevaluated "pl.scan_parquet()" would still point to.
+
+    Parameters
+    ----------
+    cache_dir
+        The directory holding the parquet files and the cache's "index.json".
+    ttl
+        Default time to live of an entry, in seconds (None means entries never expire).
+    max_bytes
+        The total size cap of the cached parquet files.
+    """
+    _index_file = "index.json"
+
+    def __init__(self, cache_dir: str = ".query_cache", ttl: float | None = 24 * 3600, max_bytes: int = 10 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._index: dict[str, dict[str, float]] = self._load_index()
+
+    # SQL string literals ('...', with '' escapes) and quoted identifiers ("...") are kept verbatim; whitespace elsewhere is collapsed
+    _QUERY_TOKENS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+    @classmethod
+    def _normalize_query(cls, query: str) -> str:
+        return cls._QUERY_TOKENS.sub(lambda match: match[1] or " ", query).strip().rstrip(";").strip()
+
+    @staticmethod
+    def _conn_params(conn) -> dict:
+        options: dict = getattr(conn, "options", None) or {}  # Vertica connections expose their "connect()" kwargs as ".options"
+        return {k: options.get(k) for k in ("host", "port", "database", "user")}
+
+    def key(self, query: str, conn=None, conn_params: dict | None = None, **kwargs) -> str:
+        # "kwargs" are the "fetch_data()" options (e.g. "optimize_df" or "typed"), which change the cached frame too
+        conn_params = conn_params if conn_params is not None else self._conn_params(conn)
+        payload: str = json.dumps([self._normalize_query(query), conn_params, kwargs], sort_keys=True, default=str)
+        return sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return join(self.cache_dir, f"{key}.parquet")
+
+    def _load_index(self) -> dict[str, dict[str, float]]:
+        index_path = join(self.cache_dir, self._index_file)
+        if not exists(index_path):
+            return {}
+        with open(index_path, "r") as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[None]:
+        # Processes sharing "cache_dir" serialize on a lock file: the index is re-read once locked, so that no process overwrites another's entries
+        with self._lock, open(join(self.cache_dir, self._index_file + ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._index = self._load_index()
+                yield
+                self._save_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save_index(self) -> None:
+        tmp_path = join(self.cache_dir, self._index_file + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, join(self.cache_dir, self._index_file))  # atomic, so readers never see a half-written index
+
+    def _remove(self, key: str) -> None:
+        self._index.pop(key, None)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        now = time.time()
+        for key in [key for key, entry in self._index.items() if entry["expires"] is not None and entry["expires"] <= now]:
+            self._remove(key)
+
+        # Files left out of the index (e.g. by a process that crashed before recording them) would otherwise escape "max_bytes"
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet") and name.removesuffix(".parquet") not in self._index:
+                self._remove(name.removesuffix(".parquet"))
+
+        total_bytes = sum(entry["size"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):  # least recently used first
+            if total_bytes <= self.max_bytes:
+                break
+            total_bytes -= self._index[key]["size"]
+            self._remove(key)
+
+    def fetch(self, query: str, conn, *, ttl: float | None = ..., conn_params: dict | None = None, refresh: bool = False, **kwargs) -> pl.LazyFrame:
+        """
+        Returns the result of "query" (as a LazyFrame over the in-memory frame), fetching it via "fetch_data()" (called with the extra "kwargs")
+        only on a cache miss. Pass "ttl" to override the cache's default for this entry, and "refresh=True" to force re-fetching it.
+        """
+        key: str = self.key(query, conn, conn_params, **kwargs)
+        path: str = self._path(key)
+        with self._locked_index():
+            entry = self._index.get(key)
+            if entry and not refresh and (entry["expires"] is None or entry["expires"] > time.time()) and exists(path):
+                entry["last_access"] = time.time()
+                return pl.read_parquet(path).lazy()
+
+        df: pl.DataFrame = fetch_data(query, conn, **kwargs)  # fetch outside the lock, so other queries aren't blocked meanwhile
+
+        ttl = self.ttl if ttl is ... else ttl
+        with self._locked_index():
+            tmp_path = path + ".tmp"
+            df.write_parquet(tmp_path)
+            os.replace(tmp_path, path)
+            now = time.time()
+            self._index[key] = {"created": now, "last_access": now, "expires": None if ttl is None else now + ttl, "size": getsize(path)}
+            self._evict()
+
+        return df.lazy()
+
+    def invalidate(self, query: str | None = None, conn=None, conn_params: dict | None = None, **kwargs) -> None:
+        """Drops the entry of "query" (for the given connection and "fetch_data()" options), or the entire cache if no query is given."""
+        with self._locked_index():
+            if query is None:
+                for key in list(self._index):
+                    self._remove(key)
+            else:
+                self._remove(self.key(query, conn, conn_params, **kwargs))
+
+
 def close(conn: Connection) -> None:
     # cursor_status = ""
     # if cursor:
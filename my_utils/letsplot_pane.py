@@ -2,6 +2,7 @@ import param
 from panel.reactive import ReactiveHTML
 
 import base64
+from functools import cache
 from lets_plot.plot.core import PlotSpec
 from lets_plot._kbridge import (
     _generate_static_configure_html,
@@ -11,7 +12,10 @@ from lets_plot._kbridge import (
 import polars as pl
 import pandas as pd
 
-_config_html: bytes = _generate_static_configure_html().encode("utf-8")  # load necessary JS/CSS boilerplate
+
+@cache  # generated once, upon rendering the first plot rather than upon importing
+def _config_html() -> bytes:
+    return _generate_static_configure_html().encode("utf-8")  # load necessary JS/CSS boilerplate
 
 
 class LetsPlotPane(ReactiveHTML):
@@ -44,5 +48,5 @@ class LetsPlotPane(ReactiveHTML):
 
         plot_html: str = _generate_display_html_for_raw_spec(spec, sizing_options=self.sizing_options, responsive=True)
 
-        plot_html_bytes = _config_html + plot_html.encode("utf-8")
+        plot_html_bytes = _config_html() + plot_html.encode("utf-8")
         self.plot_uri = base64.b64encode(plot_html_bytes).decode("utf-8")
@@ -1,22 +1,514 @@
+"""
+Benchmark harness of the package's public functions.
+
+    python perf_timer.py run [--filter NAME ...] [--quick] [--output results.json]
+    python perf_timer.py compare baseline.json results.json [--threshold 0.1]
+    python perf_timer.py imports  # the import-time regression check
+
+Every case is built from seeded synthetic data, so that two runs (e.g. before and after a change) measure the exact same work. The package's
+modules (and their heavy dependencies) are only imported by the cases using them, so that e.g. "compare" or "imports" load none of them.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
 import timeit
+import tracemalloc
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import product
+from typing import Callable, TYPE_CHECKING
+
 import numpy as np
+import polars as pl
+
+if TYPE_CHECKING:  # the package's modules are imported by the cases themselves (see the module's docstring)
+    from sklearn.ensemble import RandomForestRegressor
+
+
+# Heavy third-party packages, and those each submodule is allowed to pull in when one of its objects is first accessed from "my_utils"
+HEAVY_MODULES = ("sklearn", "statsmodels", "scipy", "pandas", "panel", "param", "lets_plot", "torch", "hummingbird")
+ALLOWED_HEAVY_MODULES: dict[str, set[str]] = {
+    ".cleaners": set(),
+    ".dataframes": set(),
+    ".pipeline": set(),
+    ".predictors": {"sklearn", "statsmodels", "scipy", "pandas"},
+    ".shap_calculator": {"sklearn", "scipy", "pandas"},
+    ".tree_optimize": {"sklearn", "scipy", "pandas"},
+    ".serialization": {"sklearn", "scipy", "pandas"},
+    ".letsplot_pane": {"panel", "param", "lets_plot", "pandas"},
+}
+
+
+def check_import_costs(symbols: tuple[str, ...] | None = None) -> None:
+    # Accesses each public object from a fresh interpreter, recording the heavy modules it loads and the time it takes: since the package resolves
+    # its objects lazily, e.g. "from my_utils import clean_columns" must neither load sklearn nor statsmodels
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, (os.path.dirname(package_dir), os.environ.get("PYTHONPATH"))))}
+    package: str = os.path.basename(package_dir)
+    probe = ("import json, sys, time\n"
+             "start = time.perf_counter()\n"
+             f"import {package}\n"
+             f"symbol = sys.argv[1] and getattr({package}, sys.argv[1])\n"
+             "seconds = time.perf_counter() - start\n"
+             f"loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({HEAVY_MODULES!r}))\n"
+             f"print(json.dumps([seconds, loaded, {package}._SUBMODULES.get(sys.argv[1]), {package}.__all__]))")
+
+    violations: list[str] = []
+    pending: list[str] = [""]  # "" only imports the package itself, whose "__all__" then gives the objects to check
+    while pending:
+        symbol = pending.pop(0)
+        result = subprocess.run([sys.executable, "-c", probe, symbol], capture_output=True, text=True, env=env)
+        if result.returncode:
+            print(f"{symbol or package:<26} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        seconds, loaded, submodule, public = json.loads(result.stdout.splitlines()[-1])
+        if not symbol:
+            pending.extend(symbols or public)
+
+        unexpected: set[str] = set(loaded) - ALLOWED_HEAVY_MODULES.get(submodule, set())
+        print(f"{symbol or package:<26} {1_000 * seconds:8.1f} ms  loads: {', '.join(loaded) or '-'}"
+              f"{f'  UNEXPECTED: {sorted(unexpected)}' if unexpected else ''}")
+        if unexpected:
+            violations.append(symbol or package)
+
+    if violations:
+        raise AssertionError(f"Objects pulling in unexpected heavy modules: {violations}")
+
+
+# ----- Synthetic data: every generator is seeded, so that all runs benchmark identical inputs -----
+COLUMN_WORDS = ["Customer", "ID", "Número", "Transaction", "Amount(USD)", "date", "Région", "%", "Total", "Count", "#", "Is Active?", "lastUpdated"]
+
+
+def make_column_names(num_columns: int, seed: int = 0) -> list[str]:
+    # Messy headers: mixed cases, accents, punctuation and duplicates (once the numbers are cleaned off)
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(COLUMN_WORDS, rng.integers(1, 5))) + (f" {i}" if i % 10 else "") for i in range(num_columns)]
+
+
+def make_wide_frame(num_rows: int, num_cols: int, seed: int = 0) -> pl.DataFrame:
+    # Float features on different scales, with a few outliers (as robust scaling expects)
+    rng = np.random.default_rng(seed)
+    data = rng.normal(rng.uniform(-100, 100, num_cols), rng.uniform(0.1, 50, num_cols), (num_rows, num_cols))
+    data[rng.random((num_rows, num_cols)) < 0.001] *= 1_000
+    return pl.DataFrame(data, schema=[f"feature_{j}" for j in range(num_cols)], orient="row")
+
+
+def make_sparse_frame(num_rows: int, num_cols: int, max_null_fraction: float = 0.05, seed: int = 0) -> pl.DataFrame:
+    # Each column misses up to "max_null_fraction" of its values, at random rows
+    rng = np.random.default_rng(seed)
+    data = np.where(rng.random((num_rows, num_cols)) < rng.uniform(0, max_null_fraction, num_cols), np.nan, rng.random((num_rows, num_cols)))
+    return pl.DataFrame(data, schema=[f"col_{j}" for j in range(num_cols)], orient="row").fill_nan(None)
+
+
+def make_tall_frame(num_rows: int, seed: int = 0) -> pl.DataFrame:
+    # Mixed columns stored in wide dtypes, as read from a CSV or a database: what "optimize_dtypes()" narrows and "CategoricalEncoder" encodes
+    rng = np.random.default_rng(seed)
+    return pl.DataFrame({
+        "id": np.arange(num_rows, dtype=np.int64),
+        "quantity": rng.integers(0, 200, num_rows, dtype=np.int64),
+        "amount": rng.uniform(0, 10_000, num_rows).round(2),
+        "ratio": rng.random(num_rows),
+        "is_active": rng.integers(0, 2, num_rows, dtype=np.int64),
+        "segment": rng.choice([f"segment_{i}" for i in range(40)], num_rows),
+        "country": rng.choice(["AE", "SA", "QA", "KW", "OM", "BH", None], num_rows),
+        "event_date": pl.date_range(date(2020, 1, 1), date(2020, 1, 1) + timedelta(days=num_rows - 1), eager=True) if num_rows else [],
+    })
+
+
+def make_event_log(num_customers: int, events_per_customer: int, seed: int = 0) -> pl.DataFrame:
+    # Customers' transactions: irregular gaps between events (geometric inter-arrival days), sorted by customer then date
+    rng = np.random.default_rng(seed)
+    gaps = rng.geometric(rng.uniform(0.02, 0.5, (num_customers, 1)), (num_customers, events_per_customer))
+    days = np.cumsum(gaps, axis=1).ravel()
+    return pl.DataFrame({
+        "customer_id": np.repeat(np.arange(num_customers), events_per_customer),
+        "event_date": np.datetime64("2018-01-01") + days.astype("timedelta64[D]"),
+        "amount": rng.lognormal(3, 1, num_customers * events_per_customer).round(2),
+    })
+
+
+def make_forest(num_rows: int, num_features: int, num_trees: int, max_depth: int | None = 10, seed: int = 0) -> tuple[pl.DataFrame, pl.Series, "RandomForestRegressor"]:
+    # A regression task driven by a few informative features, and a random forest fitted on it
+    from sklearn.ensemble import RandomForestRegressor
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=(num_rows, num_features))
+    y = x[:, :3] @ np.array([3., 2., 1.]) + np.sin(x[:, min(3, num_features - 1)]) + rng.normal(0, 0.5, num_rows)
+    x = pl.DataFrame(x, schema=[f"feature_{j}" for j in range(num_features)], orient="row")
+    model = RandomForestRegressor(num_trees, max_depth=max_depth, random_state=seed, n_jobs=-1).fit(x, y)
+    return x, pl.Series("target", y), model
+
+
+def make_time_series(length: int, num_exog: int, period: int = 12, seed: int = 0) -> tuple[pl.DataFrame, pl.Series]:
+    # Seasonal AR(1) exogenous variables, and a target depending on them
+    rng = np.random.default_rng(seed)
+    season = np.sin(2 * np.pi * np.arange(length) / period)[:, None]
+    x = np.empty((length, num_exog))
+    x[0] = rng.normal(size=num_exog)
+    for t in range(1, length):
+        x[t] = 0.7 * x[t - 1] + rng.normal(size=num_exog)
+    x += 3 * season
+    y = x @ rng.uniform(0.5, 2, num_exog) + 2 * season[:, 0] + rng.normal(0, 0.5, length)
+    return pl.DataFrame(x, schema=[f"exog_{j}" for j in range(num_exog)], orient="row"), pl.Series("target", y)
+
+
+# ----- Harness -----
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[..., Callable[[], object]]  # receives one combination of "params" and returns the (argument-less) callable to measure
+    params: dict[str, tuple]
+    quick_params: dict[str, tuple]  # the smaller grid run with "--quick"
+    repeat: int = 5
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(repeat: int = 5, quick: dict[str, tuple] | None = None, **params: tuple) -> Callable:
+    # Registers a setup function, run once per combination of the parameters' values
+    def register(setup: Callable[..., Callable[[], object]]) -> Callable[..., Callable[[], object]]:
+        name = setup.__name__.removeprefix("bench_")
+        BENCHMARKS[name] = Benchmark(name, setup, params, {**params, **(quick or {})}, repeat)
+        return setup
+
+    return register
+
+
+def _reset_peak_rss() -> bool:
+    # Linux lets a process reset its resident set's high-water mark ("VmHWM"), so that the setup's own peak isn't attributed to the measured code
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_bytes(peak: bool) -> int:
+    # Current (or peak) resident set size of this process; without "/proc", only the peak is known (in kilobytes on Linux, bytes on macOS)
+    try:
+        with open("/proc/self/status") as f:
+            field = "VmHWM:" if peak else "VmRSS:"
+            return next(int(line.split()[1]) * 1024 for line in f if line.startswith(field))
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    # Timings come from untraced runs (the first one being a discarded warm-up). Memory is the growth of the process's peak resident set size over
+    # its size once set up, which covers every allocator (NumPy, Polars/Arrow, sklearn...); when the peak can't be reset (outside of Linux), it
+    # only counts the growth beyond the setup's own peak. A separate "tracemalloc" run reports the Python (and NumPy) side on its own
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):  # silences progress bars and prints
+        exact_peak: bool = _reset_peak_rss()
+        baseline_rss: int = _rss_bytes(peak=not exact_peak)
+        func()
+        times: list[float] = []
+        for _ in range(repeat):
+            start = timeit.default_timer()
+            func()
+            times.append(timeit.default_timer() - start)
+        peak_rss: int = _rss_bytes(peak=True)
+
+        tracemalloc.start()
+        try:
+            func()
+            python_peak: int = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {"median_s": float(np.median(times)), "min_s": min(times), "max_s": max(times), "repeat": repeat,
+            "peak_memory_bytes": max(0, peak_rss - baseline_rss), "peak_rss_bytes": peak_rss, "python_peak_bytes": python_peak}
+
+
+def _run_case(name: str, params: dict) -> dict:
+    # Runs in its own interpreter (see "run_benchmarks()"), so that cases don't share memory peaks, caches or warmed-up state
+    bench = BENCHMARKS[name]
+    with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+        func = bench.setup(**params)
+    return measure(func, bench.repeat)
+
+
+def _case_id(name: str, params: dict) -> str:
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def run_benchmarks(filters: tuple[str, ...] = (), quick: bool = False, output: str | None = None) -> dict:
+    """
+    Runs every registered benchmark (or those whose name contains one of "filters") over its parameter grid, each case in a fresh subprocess,
+    prints each case and returns (and optionally saves to "output") the JSON-serializable results.
+    """
+    results: dict = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "processor": platform.processor(), "cpu_count": os.cpu_count(), "python": platform.python_version()},
+        "versions": {"numpy": np.__version__, "polars": pl.__version__},
+        "quick": quick,
+        "cases": {},
+    }
+    for bench in BENCHMARKS.values():
+        if filters and not any(name in bench.name for name in filters):
+            continue
+
+        grid: dict[str, tuple] = bench.quick_params if quick else bench.params
+        for values in product(*grid.values()):
+            params = dict(zip(grid, values))
+            case = _case_id(bench.name, params)
+            process = subprocess.run([sys.executable, os.path.abspath(__file__), "case", bench.name, json.dumps(params)],
+                                     capture_output=True, text=True)
+            if process.returncode:  # a failing case is reported rather than aborting the whole run
+                error: str = (process.stderr.strip().splitlines() or [f"exit code {process.returncode}"])[-1]
+                results["cases"][case] = {"benchmark": bench.name, "params": params, "error": error}
+                print(f"{case:<70} FAILED: {error}")
+                continue
+
+            result = results["cases"][case] = {"benchmark": bench.name, "params": params, **json.loads(process.stdout.splitlines()[-1])}
+            print(f"{case:<70} {1_000 * result['median_s']:>10.2f} ms  (min {1_000 * result['min_s']:.2f} ms)  "
+                  f"peak +{result['peak_memory_bytes'] / 2**20:>8.2f} MiB  (Python {result['python_peak_bytes'] / 2**20:.2f} MiB)")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def compare_results(
+        baseline: str | dict,
+        current: str | dict,
+        threshold: float = 0.1,
+        min_seconds: float = 1e-3,
+        min_bytes: int = 4 * 2**20,
+) -> list[str]:
+    """
+    Compares two runs of "run_benchmarks()" (dicts or paths to their JSON files) case by case, and returns the cases that regressed: whose median
+    time or peak memory grew by more than "threshold" (relative). Cases whose times are both below "min_seconds", or whose memory peaks are both
+    below "min_bytes" (the resident set size moving by whole pages and allocator arenas), are too noisy to be flagged on that measure.
+    """
+    runs: list[dict] = []
+    for run in (baseline, current):
+        if isinstance(run, str):
+            with open(run) as f:
+                run = json.load(f)
+        runs.append(run)
+    baseline, current = runs
+
+    if baseline["machine"] != current["machine"]:
+        print(f"Warning: the runs come from different machines ({baseline['machine']} vs {current['machine']}).")
+
+    regressions: list[str] = []
+    for case in sorted(baseline["cases"].keys() | current["cases"].keys()):
+        before, after = baseline["cases"].get(case), current["cases"].get(case)
+        if before is None or after is None:
+            print(f"{case:<70} {'only in the current run' if before is None else 'only in the baseline'}")
+            continue
+        if "error" in before or "error" in after:
+            status = "FAILING" if "error" in after else "fixed"
+            print(f"{case:<70} {status}: {after.get('error', before.get('error'))}")
+            if "error" in after and "error" not in before:
+                regressions.append(case)
+            continue
+
+        time_ratio = after["median_s"] / before["median_s"]
+        memory_ratio = (after["peak_memory_bytes"] + 1) / (before["peak_memory_bytes"] + 1)
+        flags: list[str] = []
+        if time_ratio > 1 + threshold and max(before["median_s"], after["median_s"]) >= min_seconds:
+            flags.append("TIME")
+        if memory_ratio > 1 + threshold and max(before["peak_memory_bytes"], after["peak_memory_bytes"]) >= min_bytes:
+            flags.append("MEMORY")
+        if flags:
+            regressions.append(case)
+
+        print(f"{case:<70} time {1_000 * before['median_s']:>10.2f} -> {1_000 * after['median_s']:>10.2f} ms ({time_ratio:5.2f}x)  "
+              f"peak +{before['peak_memory_bytes'] / 2**20:>8.2f} -> +{after['peak_memory_bytes'] / 2**20:>8.2f} MiB ({memory_ratio:5.2f}x)"
+              f"{'  REGRESSION: ' + ', '.join(flags) if flags else ''}")
+
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}.")
+    return regressions
+
+
+# ----- Benchmarks of the public functions -----
+@benchmark(num_columns=(100, 10_000), replace=(False, True), quick={"num_columns": (100,)})
+def bench_clean_columns(num_columns: int, replace: bool) -> Callable[[], object]:
+    from cleaners import clean_columns
+    names = make_column_names(num_columns)
+    mapping = {"%": "pct", "#": "num", "ID": "Identifier"} if replace else None
+    return lambda: clean_columns(names, replace=mapping)
+
+
+@benchmark(num_files=(5, 20), cached=(False, True), quick={"num_files": (5,)})
+def bench_column_cleaner(num_files: int, cached: bool) -> Callable[[], object]:
+    # Many wide files sharing most of their headers, as when ingesting a folder of exports: "ColumnCleaner" memoizes the names it already cleaned
+    from cleaners import clean_columns, ColumnCleaner
+    header = make_column_names(5_000)
+    files = [header[:-50] + [f"Extra Column-{file}.{j}" for j in range(50)] for file in range(num_files)]
+    mapping = {"%": "pct", "#": "num", "ID": "Identifier"}
+    if cached:
+        return lambda: [ColumnCleaner(replace=mapping)(names) for names in files]  # a cold cache at every run
+    return lambda: [clean_columns(names, replace=mapping) for names in files]
+
+
+@benchmark(num_rows=(100_000, 500_000), typed=(False, True), quick={"num_rows": (100_000,)})
+def bench_fetch_decoding(num_rows: int, typed: bool) -> Callable[[], object]:
+    # Fetched rows alongside the "cursor.description" Vertica would report for them: (name, type_code, display_size, internal_size, precision,
+    # scale, null_ok), decoded either by inference then "optimize_dtypes()", or straight from the reported types
+    from vertica_python.datatypes import VerticaType
+    from db_connect import rows_to_frame
+    from dataframes import optimize_dtypes
+    rng = np.random.default_rng(0)
+    description = [
+        ("id", VerticaType.INT8, None, 8, None, None, False),
+        ("amount", VerticaType.NUMERIC, None, None, 6, 2, True),
+        ("score", VerticaType.FLOAT8, None, 8, None, None, True),
+        ("segment", VerticaType.VARCHAR, None, 32, None, None, True),
+        ("event_date", VerticaType.DATE, None, 8, None, None, True),
+    ]
+    rows = [(i, Decimal(f"{amount:.2f}"), score, f"segment_{i % 40}", date(2020, 1, 1) + timedelta(days=i % 1500))
+            for i, amount, score in zip(range(num_rows), rng.uniform(0, 9999, num_rows), rng.random(num_rows))]
+    if typed:
+        return lambda: rows_to_frame(rows, description)
+    columns: list[str] = [col[0] for col in description]
+    return lambda: optimize_dtypes(pl.DataFrame(rows, orient="row", schema=columns, infer_schema_length=None), ignore_types=str)
+
+
+@benchmark(num_rows=(100_000, 2_000_000), lazy=(False, True), quick={"num_rows": (100_000,)})
+def bench_optimize_dtypes(num_rows: int, lazy: bool) -> Callable[[], object]:
+    from dataframes import optimize_dtypes
+    df = make_tall_frame(num_rows)
+    if lazy:
+        return lambda: optimize_dtypes(df.lazy()).collect()
+    return lambda: optimize_dtypes(df)
+
+
+@benchmark(shape=((2_000, 1_000), (200_000, 50)), quick={"shape": ((2_000, 200),)})
+def bench_smart_drop(shape: tuple[int, int]) -> Callable[[], object]:
+    from dataframes import smart_drop
+    df = make_sparse_frame(*shape)
+    return lambda: smart_drop(df)
+
+
+@benchmark(kind=("standard", "robust"), shape=((100_000, 20), (10_000, 500)), quick={"shape": ((10_000, 20),)})
+def bench_numerical_scaler(kind: str, shape: tuple[int, int]) -> Callable[[], object]:
+    from dataframes import NumericalScaler
+    df = make_wide_frame(*shape)
+    return lambda: NumericalScaler(kind=kind).fit_transform(df)
+
+
+@benchmark(num_rows=(100_000, 2_000_000), quick={"num_rows": (100_000,)})
+def bench_categorical_encoder(num_rows: int) -> Callable[[], object]:
+    from dataframes import CategoricalEncoder
+    df = make_tall_frame(num_rows).drop("event_date")
+    return lambda: CategoricalEncoder(encode_nulls=True).fit_transform(df)
+
+
+@benchmark(events=(100, 10_000), quick={"events": (100,)})
+def bench_predict_churn(events: int) -> Callable[[], object]:
+    from predictors import predict_churn
+    df = make_event_log(1, events)
+    return lambda: predict_churn(df, 30, "event_date", sort=True)
+
+
+@benchmark(num_customers=(1_000, 100_000), quick={"num_customers": (1_000,)})
+def bench_predict_churn_batch(num_customers: int) -> Callable[[], object]:
+    from predictors import predict_churn_batch
+    df = make_event_log(num_customers, 20)
+    return lambda: predict_churn_batch(df, 30, "event_date", "customer_id")
+
+
+@benchmark(repeat=3, method=("exact", "sampling"), num_features=(8, 14), quick={"num_features": (6,)})
+def bench_get_shap_values(method: str, num_features: int) -> Callable[[], object]:
+    from shap_calculator import get_shap_values
+    x, y, model = make_forest(500, num_features, 20, max_depth=6)
+    df = x.with_columns(y)
+    return lambda: get_shap_values(df, "target", model, method=method, budget=2_000, random_state=0)
+
+
+@benchmark(repeat=3, num_trees=(50, 200), num_rows=(2_000, 20_000), quick={"num_trees": (20,), "num_rows": (2_000,)})
+def bench_optimize_trees(num_trees: int, num_rows: int) -> Callable[[], object]:
+    from tree_optimize import optimize_trees
+    x, y, model = make_forest(num_rows, 10, num_trees)
+    trees = list(model.estimators_)
+
+    def run() -> object:
+        model.estimators_ = list(trees)  # "optimize_trees()" prunes the model it receives
+        return optimize_trees(x, y, model, compiled=True)
+
+    return run
+
+
+@benchmark(batch_size=(1, 1_000, 100_000), max_depth=(10, None), compiled=(False, True), quick={"batch_size": (1, 1_000), "max_depth": (10,)})
+def bench_forest_predict(batch_size: int, max_depth: int | None, compiled: bool) -> Callable[[], object]:
+    # sklearn's own "predict()" next to "CompiledForest"'s, on the same forest and batch
+    from tree_optimize import CompiledForest
+    x, y, model = make_forest(20_000, 10, 100, max_depth=max_depth)
+    predictor = CompiledForest(model) if compiled else model
+    batch = make_wide_frame(batch_size, 10, seed=1).to_numpy()
+    return lambda: predictor.predict(batch)
+
+
+@benchmark(repeat=3, num_rows=(2_000, 20_000), fast=(False, True), quick={"num_rows": (2_000,)})
+def bench_select_important_features(num_rows: int, fast: bool) -> Callable[[], object]:
+    from predictors import select_important_features
+    x, y = make_time_series(num_rows, 10)
+    return lambda: select_important_features(x, y, 5, random_state=0, return_importance=False, fast=fast)
+
+
+@benchmark(repeat=3, length=(120, 360), num_exog=(2, 4), quick={"length": (60,), "num_exog": (2,)})
+def bench_exog_arima(length: int, num_exog: int) -> Callable[[], object]:
+    from predictors import ExogArima
+    x, y = make_time_series(length, num_exog)
+
+    def run() -> np.ndarray:
+        model = ExogArima(x, y, future_steps=12, progress_bar=False)
+        model.generate_forecasted_exog()
+        return model.forecast_target()
+
+    return run
 
-# Approach 1
-def approach_1(lengths):
-    [np.random.randn(l) + 1 for l in lengths]
 
+@benchmark(repeat=3, length=(120, 360), quick={"length": (60,)})
+def bench_exog_arima_update(length: int) -> Callable[[], object]:
+    from predictors import ExogArima
+    x, y = make_time_series(length + 12, 2)
+    model = ExogArima(x[:length], y[:length], future_steps=12, progress_bar=False)
+    model.generate_forecasted_exog()
+    model.forecast_target()
+    results = model.exog_results, model.target_results
 
-# Approach 2
-def approach_2(lengths):
-    [np.random.randn(l) + np.ones(l) for l in lengths]
+    def run() -> np.ndarray | None:
+        model.exog_results, model.target_results = results  # every run extends the same fitted models by the same 12 observations
+        model.x, model.y = x[:length].to_numpy(), y[:length].to_numpy()
+        return model.update(x[length:], y[length:])
 
-# Input data
-lengthsies = [10*i for i in range(1, 501)]
+    return run
 
-# Measure time
-time_approach_1 = timeit.timeit(lambda: approach_1(lengthsies), number=100)
-time_approach_2 = timeit.timeit(lambda: approach_2(lengthsies), number=100)
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks of the my_utils package.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--filter", nargs="*", default=(), help="only run the benchmarks whose name contains one of these")
+    run_parser.add_argument("--quick", action="store_true", help="run the smaller parameter grids")
+    run_parser.add_argument("--output", help="path of the JSON file to save the results to")
+    compare_parser = commands.add_parser("compare", help="flag the regressions between two runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative increase flagged as a regression")
+    commands.add_parser("imports", help="check which heavy modules every public object pulls in")
+    case_parser = commands.add_parser("case")  # internal: measures a single case, in the subprocess spawned by "run"
+    case_parser.add_argument("name")
+    case_parser.add_argument("params", type=json.loads)
+    args = parser.parse_args()
 
-print(f"Approach 1 took {time_approach_1:.4f} seconds")
-print(f"Approach 2 took {time_approach_2:.4f} seconds")
+    if args.command == "case":
+        print(json.dumps(_run_case(args.name, args.params)))
+    elif args.command == "run":
+        run_benchmarks(tuple(args.filter), args.quick, args.output)
+    elif args.command == "compare":
+        sys.exit(1 if compare_results(args.baseline, args.current, args.threshold) else 0)
+    else:
+        check_import_costs()
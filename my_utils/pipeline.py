@@ -0,0 +1,115 @@
+import polars as pl
+from typing import Iterable, Literal
+from .cleaners import clean_columns
+from .dataframes import NumericalScaler, CategoricalEncoder, optimize_dtypes, optimized_schema, _smart_drop_plan, _apply_smart_drop
+
+
+class Pipeline:
+    """
+    Composes "clean_columns()" → "optimize_dtypes()" → "smart_drop()" → "NumericalScaler" → "CategoricalEncoder" into a single Polars lazy plan.
+
+    ".fit()" derives every step's state from the lazy output of the previous steps (each step being a streaming aggregation over the source), so no
+    intermediate copy of the data is ever materialized. ".transform()" then applies the fitted plan to new data with a single "collect()", or
+    streams it straight into a parquet file with ".sink_parquet()", keeping peak memory close to one copy of the data (or less).
+
+    Parameters
+    ----------
+    case, replace, remove_accents
+        Passed on to "clean_columns()"; set "case=None" to skip cleaning the column names.
+    optimize
+        Whether to narrow the dtypes. Repetitive strings become Categorical rather than Enum, so that new data holding unseen categories still applies.
+    drop
+        Whether to drop the null columns/rows chosen by "smart_drop()" during fitting (the same columns and null rows are dropped from new data).
+    scaler
+        The kind of "NumericalScaler", or None to skip scaling.
+    encode_nulls
+        Passed on to "CategoricalEncoder", or None to skip encoding.
+    ignore_cols
+        (Cleaned) column names left out of the dtype optimization, the scaling and the encoding.
+    """
+    def __init__(
+            self,
+            *,
+            case: str | None = "snake",
+            replace: dict[str, str] | None = None,
+            remove_accents: bool = True,
+            optimize: bool = True,
+            drop: bool = True,
+            scaler: Literal["robust", "standard"] | None = "robust",
+            encode_nulls: bool | None = False,
+            ignore_cols: Iterable[str] | str = (),
+    ):
+        self.case = case
+        self.replace = replace
+        self.remove_accents = remove_accents
+        self.optimize = optimize
+        self.drop = drop
+        self.ignore_cols = (ignore_cols,) if isinstance(ignore_cols, str) else tuple(ignore_cols)
+        self.scaler = NumericalScaler(kind=scaler) if scaler else None
+        self.encoder = CategoricalEncoder(encode_nulls=encode_nulls) if encode_nulls is not None else None
+
+        self.dtypes_: dict[str, pl.DataType] = {}
+        self.dropped_cols_: list[str] = []
+        self.filtered_cols_: list[str] = []
+        self._is_fitted = False
+
+    def _clean(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        if self.case is None:
+            return lf
+        columns: list[str] = lf.collect_schema().names()
+        return lf.rename(dict(zip(columns, clean_columns(columns, self.case, self.replace, self.remove_accents))))
+
+    def _apply(self, lf: pl.LazyFrame, fit: bool) -> pl.LazyFrame:
+        lf = self._clean(lf)
+
+        if self.optimize:
+            if fit:
+                # No Enums (Categorical instead), whereas true/false-like columns still become Boolean: their detection has its own limit
+                self.dtypes_ = optimized_schema(lf, ignore_columns=self.ignore_cols, max_enum_categories=0)
+            lf = optimize_dtypes(lf, dtypes=self.dtypes_)
+
+        if self.drop:
+            if fit:
+                self.dropped_cols_, self.filtered_cols_ = _smart_drop_plan(lf)
+            lf = _apply_smart_drop(lf, self.dropped_cols_, self.filtered_cols_)
+
+        if self.scaler:
+            if fit:
+                self.scaler.fit(lf, self.ignore_cols)
+            lf = self.scaler.transform(lf)
+
+        if self.encoder:
+            if fit:
+                self.encoder.fit(lf.drop(self.ignore_cols, strict=False))  # e.g. IDs shouldn't weigh in the categories' encodings
+            lf = self.encoder.transform(lf)
+
+        return lf
+
+    def fit(self, train_df: pl.DataFrame | pl.LazyFrame) -> None:
+        self._apply(train_df.lazy(), fit=True)
+        self._is_fitted = True
+
+    def transform(self, target_df: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        """
+        Applies the fitted plan; LazyFrames are returned as (uncollected) plans, while DataFrames go through a single "collect()".
+        Values that don't fit the fitted dtypes (e.g. "maybe" in a Y/N column, or an unparsable date) raise instead of being coerced: a ValueError
+        for DataFrames, and Polars' InvalidOperationError upon collecting (or sinking) LazyFrames.
+        """
+        if not self._is_fitted:
+            raise RuntimeError(f'This {type(self).__name__} instance is not fitted yet. Call ".fit()" first before transforming.')
+
+        lf: pl.LazyFrame = self._apply(target_df.lazy(), fit=False)
+        if isinstance(target_df, pl.LazyFrame):
+            return lf
+        try:
+            return lf.collect()
+        except pl.exceptions.InvalidOperationError as e:
+            raise ValueError(f"The data holds values outside of the fitted dtypes: {e}") from e
+
+    def fit_transform(self, df: pl.DataFrame | pl.LazyFrame) -> pl.DataFrame | pl.LazyFrame:
+        self.fit(df)
+        return self.transform(df)
+
+    def sink_parquet(self, target_df: pl.DataFrame | pl.LazyFrame, save_parquet_path: str) -> None:
+        """Streams the fitted plan's output straight into a parquet file."""
+        self.transform(target_df.lazy()).sink_parquet(save_parquet_path)
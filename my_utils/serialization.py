@@ -0,0 +1,229 @@
+import json
+import numpy as np
+import polars as pl
+from importlib import import_module
+from sklearn.base import ClassifierMixin
+from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor, ExtraTreesClassifier, RandomForestClassifier
+from sklearn.tree._tree import Tree
+from .dataframes import NumericalScaler, CategoricalEncoder
+from .tree_optimize import CompiledForest
+
+# File layout: MAGIC | header length (uint64, little-endian) | JSON header | raw array buffers, each aligned on ALIGNMENT bytes
+MAGIC = b"MYUTILS\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+type Fitted = NumericalScaler | CategoricalEncoder | CompiledForest | ExtraTreesRegressor | RandomForestRegressor | ExtraTreesClassifier | RandomForestClassifier
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _fixed_width(name: str, array: np.ndarray) -> np.ndarray:
+    # Object arrays (e.g. the "classes_" of a forest fitted on a pandas/object target) hold pointers, which can't be written: their values are
+    # stored with a fixed-width dtype instead, provided they all share one type (mixing e.g. ints and strings would silently stringify the ints)
+    if array.dtype != object:
+        return array
+    if len({type(value) for value in array.flat}) > 1 or (fixed := np.asarray(array.tolist())).dtype == object:
+        raise TypeError(f'Cannot save the object array "{name}": its values must all be strings, or all be numbers of the same type.')
+    return fixed
+
+
+def _write(path: str, header: dict, arrays: dict[str, np.ndarray]) -> None:
+    objects: set[str] = {name for name, array in arrays.items() if np.asarray(array).dtype == object}
+    arrays = {name: np.ascontiguousarray(_fixed_width(name, np.asarray(array))) for name, array in arrays.items()}
+    header = {"format_version": FORMAT_VERSION, **header, "arrays": {}}
+
+    # The arrays' offsets depend on the header's length, which depends on the offsets' digits ==> iterate until the header fits before the data
+    data_start = 0
+    while True:
+        offset: int = data_start
+        for name, array in arrays.items():
+            header["arrays"][name] = {"descr": np.lib.format.dtype_to_descr(array.dtype), "shape": array.shape, "offset": offset,
+                                      "object": name in objects}
+            offset = _align(offset + array.nbytes)
+
+        header_bytes: bytes = json.dumps(header).encode("utf-8")
+        if (required_start := _align(len(MAGIC) + 8 + len(header_bytes))) <= data_start:
+            break
+        data_start = required_start
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(8, "little"))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(array.tobytes())
+
+
+def _read(path: str, mmap: bool) -> tuple[dict, dict[str, np.ndarray]]:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} isn't a file saved by \"save_fitted()\".")
+        header: dict = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+
+    if header["format_version"] > FORMAT_VERSION:
+        raise ValueError(f"{path} was saved with format version {header['format_version']}, but only versions <= {FORMAT_VERSION} are supported.")
+
+    arrays: dict[str, np.ndarray] = {}
+    for name, spec in header["arrays"].items():
+        dtype, shape = np.lib.format.descr_to_dtype(spec["descr"]), tuple(spec["shape"])
+        if not mmap or not np.prod(shape):  # empty arrays can't be memory-mapped
+            arrays[name] = np.fromfile(path, dtype=dtype, count=int(np.prod(shape)), offset=spec["offset"]).reshape(shape)
+        else:  # read-only mapping: pages are loaded on demand and shared between the processes mapping the same file
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=spec["offset"], shape=shape)
+        if spec.get("object"):  # back to the Python objects it was saved from (see "_fixed_width()")
+            arrays[name] = arrays[name].astype(object)
+    return header, arrays
+
+
+def _class_path(obj: object) -> str:
+    return f"{type(obj).__module__}:{type(obj).__qualname__}"
+
+
+def _load_class(class_path: str) -> type:
+    module, qualname = class_path.split(":")
+    return getattr(import_module(module), qualname)
+
+
+def _json_params(estimator) -> dict:
+    # Keeps the constructor parameters that survive a JSON round trip (e.g. drops callables and nested estimators)
+    params: dict = {}
+    for name, value in estimator.get_params(deep=False).items():
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        params[name] = value
+    return params
+
+
+def _forest_payload(forest) -> tuple[dict, dict[str, np.ndarray]]:
+    if forest.n_outputs_ != 1 and isinstance(forest, ClassifierMixin):
+        raise ValueError("Only single-output forest classifiers are supported.")
+
+    states: list[dict] = [tree.tree_.__getstate__() for tree in forest.estimators_]
+    header = {
+        "kind": "forest",
+        "class": _class_path(forest),
+        "tree_class": _class_path(forest.estimators_[0]),
+        "params": _json_params(forest),
+        "tree_params": _json_params(forest.estimators_[0]),
+        "n_features_in": int(forest.n_features_in_),
+        "n_outputs": int(forest.n_outputs_),
+        "max_features": [tree.max_features_ for tree in forest.estimators_],
+        "feature_names_in": getattr(forest, "feature_names_in_", np.array([])).tolist(),
+    }
+    arrays = {
+        "nodes": np.concatenate([state["nodes"] for state in states]),
+        "values": np.concatenate([state["values"] for state in states]),
+        "node_counts": np.array([state["node_count"] for state in states], dtype=np.int64),
+        "max_depths": np.array([state["max_depth"] for state in states], dtype=np.int64),
+    }
+    if isinstance(forest, ClassifierMixin):
+        arrays["classes"] = np.asarray(forest.classes_)
+    return header, arrays
+
+
+def _load_forest(header: dict, arrays: dict[str, np.ndarray]):
+    forest = _load_class(header["class"])(**header["params"])
+    tree_class: type = _load_class(header["tree_class"])
+    is_classifier: bool = "classes" in arrays
+    n_features, n_outputs = header["n_features_in"], header["n_outputs"]
+    n_classes = np.array([len(arrays["classes"])] if is_classifier else [1] * n_outputs, dtype=np.intp)
+
+    estimators: list = []
+    boundaries = np.concatenate(([0], np.cumsum(arrays["node_counts"])))
+    for i, (start, end) in enumerate(zip(boundaries[:-1], boundaries[1:])):
+        tree_ = Tree(n_features, n_classes, n_outputs)
+        # "Tree.__setstate__()" copies the buffers into the tree's own memory
+        tree_.__setstate__({"max_depth": int(arrays["max_depths"][i]), "node_count": int(end - start),
+                            "nodes": np.asarray(arrays["nodes"][start:end]), "values": np.asarray(arrays["values"][start:end])})
+        tree = tree_class(**header["tree_params"])
+        tree.tree_, tree.n_features_in_, tree.n_outputs_, tree.max_features_ = tree_, n_features, n_outputs, header["max_features"][i]
+        if is_classifier:
+            tree.classes_, tree.n_classes_ = np.asarray(arrays["classes"]), int(n_classes[0])
+        estimators.append(tree)
+
+    forest.estimators_, forest.estimator_ = estimators, tree_class(**header["tree_params"])
+    forest.n_features_in_, forest.n_outputs_ = n_features, n_outputs
+    if header["feature_names_in"]:
+        forest.feature_names_in_ = np.array(header["feature_names_in"], dtype=object)
+    if is_classifier:
+        forest.classes_, forest.n_classes_ = np.asarray(arrays["classes"]), int(n_classes[0])
+    return forest
+
+
+_COMPILED_FOREST_ARRAYS = ("feature", "nan_feature", "threshold", "left", "missing_go_to_left", "roots", "values")
+
+
+def save_fitted(obj: Fitted, path: str) -> None:
+    """
+    Saves a fitted "NumericalScaler", "CategoricalEncoder", sklearn forest (e.g. pruned by "optimize_trees()") or "CompiledForest" in a compact versioned format:
+    a small JSON header followed by the raw (aligned) buffers of its arrays.
+    """
+    if isinstance(obj, NumericalScaler):
+        if obj.center_ is None:
+            raise RuntimeError(f'This {type(obj).__name__} instance is not fitted yet. Call ".fit()" first before saving.')
+        header = {"kind": "scaler", "scaler_kind": obj.kind, "digest_size": obj.digest_size, "feature_names_in": obj.feature_names_in_,
+                  "ignore_cols": [obj.ignore_cols] if isinstance(obj.ignore_cols, str) else list(obj.ignore_cols)}
+        arrays = {"center": obj.center_, "scale": obj.scale_, "n_samples_seen": obj.n_samples_seen_}
+
+    elif isinstance(obj, CategoricalEncoder):
+        if not obj.categories_:
+            raise RuntimeError(f'This {type(obj).__name__} instance is not fitted yet. Call ".fit()" first before saving.')
+        header = {"kind": "encoder", "encode_nulls": obj.encode_nulls, "unseen_value": obj.unseen_value,
+                  "categories": {column: enum.categories.to_list() for column, enum in obj.categories_.items()},
+                  "null_encodings": obj.null_encodings_}
+        arrays = {f"encodings/{column}": encodings for column, encodings in obj.encodings_.items()}
+
+    elif isinstance(obj, CompiledForest):
+        header = {"kind": "compiled_forest", "max_depth": obj.max_depth, "n_features_in": obj.n_features_in_}
+        arrays = {name: getattr(obj, name) for name in _COMPILED_FOREST_ARRAYS}
+        if obj.classes_ is not None:
+            arrays["classes"] = obj.classes_
+
+    elif hasattr(obj, "estimators_"):
+        header, arrays = _forest_payload(obj)
+
+    else:
+        raise TypeError(f"Cannot save objects of type {type(obj).__name__}.")
+
+    _write(path, header, arrays)
+
+
+def load_fitted(path: str, mmap: bool = True) -> Fitted:
+    """
+    Loads an object saved by "save_fitted()"; with "mmap=True" its arrays are memory-mapped rather than read, so loading takes milliseconds and
+    worker processes loading the same file share its pages. This holds for scalers, encoders and "CompiledForest"s, which use the arrays as they
+    are; sklearn forests are rebuilt tree by tree, and "Tree.__setstate__()" copies every node array into the tree's own memory.
+    """
+    header, arrays = _read(path, mmap)
+
+    if header["kind"] == "scaler":
+        scaler = NumericalScaler(kind=header["scaler_kind"], digest_size=header["digest_size"])
+        scaler.feature_names_in_, scaler.ignore_cols = header["feature_names_in"], tuple(header["ignore_cols"])
+        scaler.center_, scaler.scale_, scaler.n_samples_seen_ = arrays["center"], arrays["scale"], arrays["n_samples_seen"]
+        return scaler
+
+    if header["kind"] == "encoder":
+        encoder = CategoricalEncoder(encode_nulls=header["encode_nulls"], unseen_value=header["unseen_value"])
+        encoder.categories_ = {column: pl.Enum(categories) for column, categories in header["categories"].items()}
+        encoder.encodings_ = {column: arrays[f"encodings/{column}"] for column in header["categories"]}
+        encoder.null_encodings_ = header["null_encodings"]
+        return encoder
+
+    if header["kind"] == "compiled_forest":  # predicts straight from the (mapped) arrays
+        forest = CompiledForest.__new__(CompiledForest)
+        for name in _COMPILED_FOREST_ARRAYS:
+            setattr(forest, name, arrays[name])
+        forest.max_depth, forest.n_features_in_, forest.classes_ = header["max_depth"], header["n_features_in"], arrays.get("classes")
+        forest.is_leaf = forest.left == np.arange(len(forest.left))  # derived rather than saved, so files written before it still load
+        return forest
+
+    if header["kind"] == "forest":
+        return _load_forest(header, arrays)
+
+    raise ValueError(f"Unknown kind of saved object: {header['kind']}.")
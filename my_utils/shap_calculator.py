@@ -1,40 +1,167 @@
 import polars as pl
-from itertools import combinations
-from tqdm import trange
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from multiprocessing import get_context
+from typing import Callable, Iterable, Literal
+from tqdm import tqdm
 from sklearn.base import BaseEstimator
 import pandas as pd
 from math import factorial
 
-type FeaturesSet = frozenset[str]
+# Each worker process receives the model and the data once (through the pool's initializer), then only evaluates chunks of coalitions
+_shap_state: tuple[BaseEstimator, np.ndarray, list[str]] | None = None
 
 
-def get_shap_values(df: pl.DataFrame, target: str, model: BaseEstimator) -> pd.DataFrame:
-    # TODO: Fix shapley weights
+def _init_shap_worker(model: BaseEstimator, x: np.ndarray, columns: list[str]) -> None:
+    global _shap_state
+    _shap_state = model, x, columns
+
+
+def _coalition_masks(codes: np.ndarray, num_features: int) -> np.ndarray:
+    # Coalition "c" holds feature "j" iff the jth bit of "c" is set: (n_coalitions, n_features) boolean matrix
+    return ((codes[:, None] >> np.arange(num_features)) & 1).astype(bool)
+
+
+def _coalition_values(model: BaseEstimator, x: np.ndarray, columns: list[str], masks: np.ndarray) -> np.ndarray:
+    # Mean prediction of every coalition, the features outside of it being zeroed: all coalitions' inputs are stacked into a single "predict()"
+    stacked: np.ndarray = np.where(masks[:, None, :], x[None, :, :], 0.).reshape(-1, x.shape[1])
+    predictions = model.predict(pl.DataFrame(stacked, schema=columns, orient="row"))
+    return np.asarray(predictions, dtype=np.float64).reshape(len(masks), len(x)).mean(axis=1)
+
+
+def _pooled_coalition_values(masks: np.ndarray) -> np.ndarray:
+    return _coalition_values(*_shap_state, masks)
+
+
+def _exact_shap(evaluate: Callable[[Iterable[np.ndarray]], np.ndarray], n: int, chunk_size: int) -> tuple[np.ndarray, np.ndarray]:
+    # Evaluates all the 2^n coalitions, then accumulates every feature's marginal contributions with the Shapley weights
+    num_coalitions: int = 1 << n
+    chunks = (_coalition_masks(np.arange(start, min(start + chunk_size, num_coalitions)), n) for start in range(0, num_coalitions, chunk_size))
+    coalition_values: np.ndarray = evaluate(tqdm(chunks, total=-(-num_coalitions // chunk_size)))  # indexed by coalition code
+
+    codes = np.arange(num_coalitions)
+    sizes: np.ndarray = _coalition_masks(codes, n).sum(axis=1)
+    # Weight of the marginal contribution v(S ∪ {i}) - v(S), indexed by the size of S ∪ {i}
+    shap_weights = np.array([factorial(s - 1) * factorial(n - s) / factorial(n) if s else 0. for s in range(n + 1)])
+
+    magnitude, direction = np.zeros(n), np.zeros(n)
+    for i in range(n):
+        with_feature: np.ndarray = codes[(codes >> i) & 1 == 1]
+        difference: np.ndarray = coalition_values[with_feature] - coalition_values[with_feature ^ (1 << i)]  # add "feature" to the coalition
+        weights: np.ndarray = shap_weights[sizes[with_feature]]
+        magnitude[i], direction[i] = weights @ np.abs(difference), weights @ difference
+    return magnitude, direction
+
+
+def _sampled_shap(
+        evaluate: Callable[[Iterable[np.ndarray]], np.ndarray],
+        n: int,
+        chunk_size: int,
+        budget: int,
+        tolerance: float | None,
+        rng: np.random.Generator,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict]:
+    # Antithetic permutation sampling: each sampled ordering of the features is paired with its reverse, and every feature's marginal contribution
+    # (the value gained when it joins its predecessors) is averaged over the pairs. A pair costs 2(n - 1) evaluations, the empty and full
+    # coalitions being shared, and pairs being i.i.d. their spread gives the standard errors
+    empty_value, full_value = evaluate([np.zeros((1, n), dtype=bool), np.ones((1, n), dtype=bool)])
+    num_pairs: int = max(2, (budget - 2) // (2 * max(n - 1, 1)))
+    pairs_per_batch: int = max(1, chunk_size // (2 * max(n - 1, 1)))
+    positions = np.arange(1, n)[None, :, None]  # the prefix lengths of the coalitions evaluated along an ordering
+
+    pair_directions, pair_magnitudes, convergence = [], [], []
+    num_evaluations = 2
+    progress = tqdm(total=num_pairs)
+    while (num_sampled := sum(map(len, pair_directions))) < num_pairs:
+        batch_size: int = min(pairs_per_batch, num_pairs - num_sampled)
+        ranks: np.ndarray = np.argsort(rng.permuted(np.tile(np.arange(n), (batch_size, 1)), axis=1), axis=1)  # each feature's position
+        ranks = np.concatenate((ranks, n - 1 - ranks))  # antithetic (reversed) orderings
+
+        masks: np.ndarray = (ranks[:, None, :] < positions).reshape(-1, n)  # (orderings * (n - 1), n) prefix coalitions
+        values = np.empty((len(ranks), n + 1))
+        values[:, 0], values[:, n] = empty_value, full_value
+        values[:, 1:n] = evaluate([masks]).reshape(len(ranks), n - 1)
+        marginals: np.ndarray = np.take_along_axis(np.diff(values, axis=1), ranks, axis=1)  # per ordering and feature
+
+        pair_directions.append((marginals[:batch_size] + marginals[batch_size:]) / 2)
+        pair_magnitudes.append((np.abs(marginals[:batch_size]) + np.abs(marginals[batch_size:])) / 2)
+        num_evaluations += len(masks)
+        progress.update(batch_size)
+
+        directions: np.ndarray = np.concatenate(pair_directions)
+        direction_se: np.ndarray = directions.std(axis=0, ddof=1) / np.sqrt(len(directions)) if len(directions) > 1 else np.full(n, np.inf)
+        max_se = float(100 * direction_se.max() / np.abs(directions.mean(axis=0)).sum())  # in percentage points of the output's "direction"
+        convergence.append((num_evaluations, max_se))
+        if tolerance is not None and max_se <= tolerance:
+            break
+    progress.close()
+
+    directions, magnitudes = np.concatenate(pair_directions), np.concatenate(pair_magnitudes)
+    report = {"num_evaluations": num_evaluations, "num_permutations": 2 * len(directions), "converged": tolerance is not None and max_se <= tolerance,
+              "convergence": convergence}
+    return (magnitudes.mean(axis=0), directions.mean(axis=0),
+            magnitudes.std(axis=0, ddof=1) / np.sqrt(len(magnitudes)), directions.std(axis=0, ddof=1) / np.sqrt(len(directions)), report)
+
+
+def get_shap_values(
+        df: pl.DataFrame,
+        target: str,
+        model: BaseEstimator,
+        max_chunk_rows: int = 1_000_000,
+        n_jobs: int = 1,
+        method: Literal["exact", "sampling"] = "exact",
+        budget: int = 10_000,
+        tolerance: float | None = None,
+        random_state: int | None = None,
+) -> pd.DataFrame:
+    """
+    Computes the Shapley values of the features on the model's mean prediction, the features left out of a coalition being zeroed.
+
+    Coalitions are evaluated in chunks of about "max_chunk_rows" stacked rows (one "predict()" call each), optionally spread across "n_jobs"
+    processes. The "exact" method evaluates all the 2^n coalitions and weighs the marginal contributions by |S|!(n - |S| - 1)!/n!, which
+    limits it to about 20 features; the "sampling" method estimates them from antithetic pairs of random feature orderings within "budget"
+    coalition evaluations, at least 4(n - 1) + 2 (stopping early once every standard error is within "tolerance" percentage points).
+
+    Returns
+    -------
+    pd.DataFrame
+        The features' "magnitude" and "direction" (in percentages), sorted by magnitude. The sampling method adds their standard errors
+        ("magnitude_se" and "direction_se", in the same units), and reports its evaluations and convergence history in the frame's "attrs".
+    """
     # TODO: Add local shapley values -> per-row shapley value (each observation/record is a game, each feature is a player)
     # TODO: Allow missing feature treatment to be either all zeros or random values
     df = df.drop(target)
-    features_set: FeaturesSet = frozenset(df.columns)
-    n = len(features_set)
-    prediction_map: dict[FeaturesSet, float] = {features_set: model.predict(df).mean()}
-    shap_df: pd.DataFrame = pd.DataFrame({"magnitude": [0.], "direction": [0.]}, index=features_set)
-
-    comb: tuple[str]
-    for s in trange(n, 0, -1):
-        shap_weight = factorial(s)*factorial(n - s - 1)/factorial(n)
-        for comb in combinations(features_set, s):
-            coalition: FeaturesSet = frozenset(comb)  # features subset
-            df_aug = df.with_columns(pl.lit(0.).alias(col) for col in features_set - coalition)
-            base_prediction: float = prediction_map[coalition]
-
-            for feature in comb:
-                coalition_minus_feature = coalition - {feature}
-                if coalition_minus_feature not in prediction_map:
-                    prediction_map[coalition_minus_feature] = model.predict(df_aug.with_columns(pl.lit(0.).alias(feature))).mean()  # remove "feature"
-
-                difference = base_prediction - prediction_map[coalition_minus_feature]
-                shap_df.loc[feature, "magnitude"] += abs(difference)
-                shap_df.loc[feature, "direction"] += difference
-
-    shap_df["magnitude"] = (100 * shap_df["magnitude"] / shap_df["magnitude"].sum()).round(1)
-    shap_df["direction"] = (100 * shap_df["direction"] / shap_df["direction"].abs().sum()).round(1)
+    columns: list[str] = df.columns
+    x: np.ndarray = df.to_numpy().astype(np.float64)
+    n = len(columns)
+    chunk_size: int = max(1, max_chunk_rows // max(len(x), 1))  # coalitions per "predict()" call
+    if method == "sampling" and budget < (min_budget := 2 + 4 * (n - 1)):  # two antithetic pairs, the fewest giving standard errors
+        raise ValueError(f"The sampling method needs a budget of at least {min_budget} evaluations for {n} features, got {budget} instead.")
+
+    # spawned rather than forked workers, as forking after Polars started its thread pool can deadlock
+    with (ProcessPoolExecutor(None if n_jobs == -1 else n_jobs, mp_context=get_context("spawn"), initializer=_init_shap_worker,
+                              initargs=(model, x, columns)) if n_jobs != 1 else nullcontext()) as executor:
+        def evaluate(masks: Iterable[np.ndarray]) -> np.ndarray:
+            chunks = (chunk[start: start + chunk_size] for chunk in masks for start in range(0, len(chunk), chunk_size))
+            if executor is None:
+                return np.concatenate([np.empty(0), *(_coalition_values(model, x, columns, chunk) for chunk in chunks)])
+            return np.concatenate([np.empty(0), *executor.map(_pooled_coalition_values, chunks)])
+
+        if method == "exact":
+            magnitude, direction = _exact_shap(evaluate, n, chunk_size)
+        elif method == "sampling":
+            magnitude, direction, magnitude_se, direction_se, report = _sampled_shap(evaluate, n, chunk_size, budget, tolerance,
+                                                                                     np.random.default_rng(random_state))
+        else:
+            raise ValueError(f'Expected method to be either "exact" or "sampling", got "{method}" instead.')
+
+    magnitude_total, direction_total = magnitude.sum(), np.abs(direction).sum()
+    shap_df: pd.DataFrame = pd.DataFrame({"magnitude": magnitude, "direction": direction}, index=columns)
+    shap_df["magnitude"] = (100 * shap_df["magnitude"] / magnitude_total).round(1)
+    shap_df["direction"] = (100 * shap_df["direction"] / direction_total).round(1)
+    if method == "sampling":
+        shap_df["magnitude_se"] = (100 * magnitude_se / magnitude_total).round(2)
+        shap_df["direction_se"] = (100 * direction_se / direction_total).round(2)
+        shap_df.attrs.update(report)
     return shap_df.sort_values("magnitude", ascending=False)
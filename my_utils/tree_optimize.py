@@ -1,11 +1,10 @@
 import numpy as np
 import polars as pl
-from hummingbird.ml import convert
-from copy import deepcopy
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor, ExtraTreesClassifier, RandomForestClassifier
 from sklearn.tree import DecisionTreeRegressor, DecisionTreeClassifier
-from tqdm import tqdm, trange
+from tqdm import tqdm
 from rich import print
 
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -13,25 +12,171 @@ type TreeModel = ExtraTreesRegressor | RandomForestRegressor | ExtraTreesClassif
 type Tree = DecisionTreeRegressor | DecisionTreeClassifier
 
 
-def optimize_trees(x: pl.DataFrame, y: pl.Series, model: TreeModel, hummingnize: bool = True) -> TreeModel:
-    # Evaluate the score of each individual decision tree then order in descending order based on performance:
+def _tree_predictions(x: pl.DataFrame | np.ndarray, model: TreeModel) -> np.ndarray:
+    # Converts "x" once, then predicts with every tree once: (n_trees, n_samples, n_outputs) predictions for regressors,
+    # or (n_trees, n_samples, n_classes) probabilities for classifiers
+    x = np.ascontiguousarray(x.to_numpy() if isinstance(x, pl.DataFrame) else x, dtype=np.float32)  # trees split on float32 thresholds
+    if hasattr(model, "classes_"):
+        return np.stack([tree.predict_proba(x, check_input=False) for tree in tqdm(model.estimators_)])
+    return np.stack([tree.predict(x, check_input=False).reshape(len(x), -1) for tree in tqdm(model.estimators_)])
+
+
+def _ensemble_scores(predictions: np.ndarray, y: np.ndarray, model: TreeModel) -> np.ndarray:
+    # Scores (accuracy for classifiers, R² for regressors) of each entry along the first axis of (n, n_samples, n_outputs|n_classes) predictions
+    if hasattr(model, "classes_"):
+        y_idx: np.ndarray = np.searchsorted(model.classes_, y)
+        return (predictions.argmax(axis=2) == y_idx).mean(axis=1)
+
+    y = y.reshape(len(y), -1)
+    sse: np.ndarray = ((predictions - y) ** 2).sum(axis=1)
+    sst: np.ndarray = ((y - y.mean(axis=0)) ** 2).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(sst > 0, 1 - sse / sst, (sse == 0).astype(np.float64))  # sklearn's "r2_score()" convention for constant targets
+    return r2.mean(axis=1)
+
+
+def _bfs_order(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+    # Breadth-first node order in which both children of a node are adjacent (left first)
+    levels: list[np.ndarray] = [frontier := np.zeros(1, dtype=np.int64)]
+    while (frontier := frontier[children_left[frontier] != -1]).size:
+        frontier = np.column_stack((children_left[frontier], children_right[frontier])).ravel()
+        levels.append(frontier)
+    return np.concatenate(levels)
+
+
+_LEAF_CHECK_EVERY = 4  # levels walked by "CompiledForest._predict_batch()" between checks for whether every lane already reached a leaf
+
+
+class CompiledForest:
+    """
+    A pure-NumPy inference engine for (pruned) sklearn forests, which needs neither hummingbird nor torch.
+
+    Every tree is flattened into contiguous node arrays (breadth-first, with siblings adjacent so that a node's child is "left + went_right"), and
+    leaves loop onto themselves. Prediction then walks all the trees for a whole batch of rows at once, one depth level per vectorized step.
+
+    It pays off for latency-bound predictions of a few rows with shallow trees (~4x sklearn's "predict()" on 256 rows of depth-10 trees); on large
+    batches, and above all with deep (unbounded) trees, every step still walks the deepest path of any lane, and sklearn's "predict()" is faster.
+    """
+    def __init__(self, model: TreeModel):
+        features, thresholds, lefts, missing_go_to_left, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in (estimator.tree_ for estimator in model.estimators_):
+            order: np.ndarray = _bfs_order(tree.children_left, tree.children_right)
+            new_ids = np.empty(tree.node_count, dtype=np.int64)
+            new_ids[order] = np.arange(tree.node_count)
+            is_leaf: np.ndarray = tree.children_left[order] == -1
+
+            # Trees compare float32 features with float64 thresholds: rounding the thresholds down to float32 keeps "x <= threshold" exact.
+            # Infinite thresholds (splitting missing values from the rest) become finite, as missing values are routed as ±inf (see below)
+            threshold: np.ndarray = tree.threshold[order].astype(np.float32)
+            threshold = np.where(threshold > tree.threshold[order], np.nextafter(threshold, np.float32(-np.inf)), threshold)
+            threshold = np.clip(threshold, np.finfo(np.float32).min, np.finfo(np.float32).max)
+
+            features.append(np.where(is_leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(is_leaf, np.inf, threshold).astype(np.float32))  # leaves never "go right", i.e. stay put
+            lefts.append(offset + np.where(is_leaf, np.arange(tree.node_count), new_ids[tree.children_left[order]]))
+            missing_go_to_left.append(is_leaf | (tree.missing_go_to_left[order].astype(bool) if hasattr(tree, "missing_go_to_left") else False))
+            values.append(tree.value[order])
+            roots.append(offset)
+            offset += tree.node_count
+
+        self.feature: np.ndarray = np.concatenate(features).astype(np.int32)
+        self.threshold: np.ndarray = np.concatenate(thresholds)
+        self.left: np.ndarray = np.concatenate(lefts).astype(np.int32)
+        self.missing_go_to_left: np.ndarray = np.concatenate(missing_go_to_left)
+        self.is_leaf: np.ndarray = self.left == np.arange(len(self.left))
+        self.nan_feature: np.ndarray = self.feature + model.n_features_in_ * self.missing_go_to_left.astype(np.int32)
+        self.roots: np.ndarray = np.array(roots, dtype=np.int32)
+        self.max_depth: int = max(estimator.tree_.max_depth for estimator in model.estimators_)
+        self.n_features_in_: int = model.n_features_in_
+        self.classes_: np.ndarray | None = np.asarray(model.classes_) if hasattr(model, "classes_") else None
+
+        values: np.ndarray = np.concatenate(values)  # (n_nodes, n_outputs, max_n_classes)
+        if self.classes_ is not None:  # leaves' class probabilities
+            values = values[:, 0, :]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = np.nan_to_num(values / values.sum(axis=1, keepdims=True))
+        else:  # leaves' predictions of each output
+            values = values[:, :, 0]
+        self.values: np.ndarray = np.ascontiguousarray(values, dtype=np.float64)
+
+    def _predict_batch(self, batch: np.ndarray) -> np.ndarray:
+        feature: np.ndarray = self.feature
+        if (is_nan := np.isnan(batch)).any():  # missing values read as +inf (i.e. go right), or as -inf in the columns appended for "nan_feature"
+            batch = np.concatenate((np.where(is_nan, np.inf, batch), np.where(is_nan, -np.inf, batch)), axis=1)
+            feature = self.nan_feature
+        flat_batch: np.ndarray = batch.ravel()
+        row_offsets: np.ndarray = (np.arange(len(batch), dtype=np.int32) * batch.shape[1])[:, None]
+
+        # (rows, trees) buffers reused at every level: the current nodes, their features' positions in "flat_batch", values and thresholds
+        nodes = np.empty((len(batch), len(self.roots)), dtype=np.int32)
+        nodes[:] = self.roots
+        positions: np.ndarray = np.empty_like(nodes)
+        feature_values = np.empty(nodes.shape, dtype=np.float32)
+        thresholds: np.ndarray = np.empty_like(feature_values)
+        go_right = np.empty(nodes.shape, dtype=bool)
+
+        for level in range(self.max_depth):
+            # Every few levels, stop early once all lanes sit on a leaf (i.e. the batch's rows took shallower paths than the deepest one)
+            if level % _LEAF_CHECK_EVERY == _LEAF_CHECK_EVERY - 1 and np.take(self.is_leaf, nodes, out=go_right).all():
+                break
+            np.take(feature, nodes, out=positions)
+            positions += row_offsets
+            np.take(flat_batch, positions, out=feature_values)
+            np.take(self.threshold, nodes, out=thresholds)
+            np.greater(feature_values, thresholds, out=go_right)
+            np.take(self.left, nodes, out=nodes)
+            nodes += go_right
+
+        return self.values[nodes].mean(axis=1)
+
+    def _predict(self, x: pl.DataFrame | np.ndarray, batch_size: int, n_jobs: int) -> np.ndarray:
+        x = np.ascontiguousarray(x.to_numpy() if isinstance(x, pl.DataFrame) else x, dtype=np.float32)
+        if x.ndim != 2 or x.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected a 2D input with {self.n_features_in_} features, got an input of shape {x.shape} instead.")
+
+        batches = (x[start: start + batch_size] for start in range(0, len(x), batch_size))
+        if n_jobs == 1:
+            return np.concatenate([self._predict_batch(batch) for batch in batches])
+        with ThreadPoolExecutor(None if n_jobs == -1 else n_jobs) as executor:  # NumPy releases the GIL while gathering
+            return np.concatenate(list(executor.map(self._predict_batch, batches)))
+
+    def predict_proba(self, x: pl.DataFrame | np.ndarray, batch_size: int = 256, n_jobs: int = 1) -> np.ndarray:
+        if self.classes_ is None:
+            raise AttributeError("predict_proba() is only available for compiled forest classifiers.")
+        return self._predict(x, batch_size, n_jobs)
+
+    def predict(self, x: pl.DataFrame | np.ndarray, batch_size: int = 256, n_jobs: int = 1) -> np.ndarray:
+        predictions: np.ndarray = self._predict(x, batch_size, n_jobs)
+        if self.classes_ is not None:
+            return self.classes_[predictions.argmax(axis=1)]
+        return predictions[:, 0] if predictions.shape[1] == 1 else predictions
+
+
+def optimize_trees(x: pl.DataFrame, y: pl.Series, model: TreeModel, compiled: bool = False, hummingnize: bool | None = None) -> TreeModel | CompiledForest:
+    if hummingnize is not None:  # the former name of "compiled", from when the pruned forest was converted with Hummingbird
+        warnings.warn('"hummingnize" is deprecated, use "compiled" instead.', DeprecationWarning, stacklevel=2)
+        compiled = hummingnize
+
+    # Every tree predicts once; the top-k ensembles' predictions are then running (cumulative) sums of the ordered trees' predictions
+    y: np.ndarray = y.to_numpy() if isinstance(y, pl.Series) else np.asarray(y)
     num_trees: int = len(model)
-    scores: list[float] = [0.0] * num_trees  # scores of individual decision trees
 
+    # Evaluate the score of each individual decision tree then order in descending order based on performance:
     print("Evaluating individual decision tree's performance...")
-    for i, tree in tqdm(enumerate(model)):
-        scores[i] = tree.score(x, y)
+    predictions: np.ndarray = _tree_predictions(x, model)
+    scores: np.ndarray = _ensemble_scores(predictions, y, model)  # scores of individual decision trees
 
     ordered: np.ndarray = np.argsort(scores)[::-1].astype(np.uint16)  # order in descending order based on the performance of individual trees
     ordered_trees: list[Tree] = np.array(model.estimators_)[ordered].tolist()
 
-    # Evaluate the scores of top-k decision trees then order them in descending order based on performance:
-    scores: list[float] = [0.0] * (num_trees - 2)  # scores of the top-k decision trees (take at least take 2 trees)
-    for k in trange(2, num_trees):
-        tqdm.write(f"Evaluating top-{k} decision trees' performance...")
-        m = deepcopy(model)  # create a new deepcopy of "model" not to alter the original model
-        m.estimators_ = ordered_trees[:k]  # select the top "k" trees from "model"
-        scores[k - 2] = m.score(x, y)
+    # Evaluate the scores of top-k decision trees (take at least take 2 trees) in one vectorized pass over the prefix sums:
+    print("Evaluating top-k decision trees' performance...")
+    predictions = predictions[ordered]
+    np.cumsum(predictions, axis=0, out=predictions)  # in place: row "k - 1" now sums the top-k trees' predictions
+    predictions = predictions[1:num_trees - 1]
+    predictions /= np.arange(2, num_trees, dtype=np.float64)[:, None, None]  # sums ==> means (i.e. the top-k forests' predictions)
+    scores: np.ndarray = _ensemble_scores(predictions, y, model)  # scores of the top-k decision trees, "k" being "index + 2"
 
     top_k: np.ndarray = np.argsort(scores)[::-1].astype(np.uint16)  # order in descending order based on the performance of top-k decision trees
 
@@ -47,7 +192,7 @@ def optimize_trees(x: pl.DataFrame, y: pl.Series, model: TreeModel, hummingnize:
                 best_k = i
 
     model.estimators_ = ordered_trees[: best_k + 2]
-    return convert(model, "pytorch") if hummingnize else model
+    return CompiledForest(model) if compiled else model  # see "CompiledForest" for when compiling is worth it
 
 
 # @cython.cfunc  # declare as a C-level function; hence only visible internally and it's to be used within current module only
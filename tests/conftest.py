@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# "db_connect" (like the benchmark script) imports its sibling modules as top-level ones ("from dataframes import ..."), so the package's own
+# directory must be importable too
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "my_utils"))
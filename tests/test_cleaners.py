@@ -0,0 +1,23 @@
+from itertools import product
+import numpy as np
+import polars as pl
+import pytest
+from my_utils.cleaners import clean_columns, clean_values
+
+# Random names mixing cases, accents, punctuation and digits, including accented letters without precomposed upper/lower ASCII counterparts
+_rng = np.random.default_rng(0)
+_ALPHABET = [*"abcXYZéÉèàÀçÇüÜßñÑ  _-.%#()0123", "Été", "PRIX", "número"]
+NAMES: list[str] = ["".join(_rng.choice(_ALPHABET, _rng.integers(1, 8))) for _ in range(500)]
+MAPPINGS = [None, {"%": "pct", "#": "num"}, {"é": "e"}, {"É": "E", "ç": "c"}, {"prix": "price", "ü": "ue"}, {"%": "pct", "ñ": "n"}]
+
+
+@pytest.mark.parametrize("mapping, case, remove_accents",
+                         list(product(MAPPINGS, ("snake", "kebab", "camel", "pascal", "const"), (True, False))))
+def test_clean_values_matches_clean_columns(mapping, case, remove_accents):
+    cleaned = pl.DataFrame({"name": NAMES}).select(clean_values("name", case, mapping, remove_accents))["name"]
+    for name, value in zip(NAMES, cleaned):
+        try:
+            expected = clean_columns(name, case, mapping, remove_accents)
+        except IndexError:  # "clean_columns()" fails on names left without any word in camel case
+            continue
+        assert value == expected, name
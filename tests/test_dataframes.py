@@ -0,0 +1,81 @@
+from datetime import date
+import numpy as np
+import polars as pl
+import pytest
+from my_utils.dataframes import optimize_dtypes, optimized_schema, NumericalScaler
+
+
+@pytest.fixture
+def fitted() -> tuple[pl.DataFrame, dict[str, pl.DataType]]:
+    df = pl.DataFrame({
+        "flag": [0, 1, 1],
+        "zeros": [0, 0, 0],
+        "answer": ["Y", "n", None],
+        "day": ["2020-01-01", "2020-02-01", None],
+        "count": [1.0, 2.0, 300.0],
+    })
+    return df, optimized_schema(df)
+
+
+def test_schema_inference(fitted):
+    _, schema = fitted
+    assert schema == {"flag": pl.Boolean, "zeros": pl.UInt8, "answer": pl.Boolean, "day": pl.Date, "count": pl.UInt16}
+
+
+def test_integral_floats_beyond_int64_stay_floats():
+    df = pl.DataFrame({"f": [1e20, 2.0, 3.0]})
+    assert "f" not in optimized_schema(df)
+    assert optimize_dtypes(df)["f"].to_list() == [1e20, 2.0, 3.0]
+
+
+def test_boolean_strings_detected_below_enum_limit():
+    df = pl.DataFrame({"flag": ["Y", "N"] * 5, "city": ["Dubai", "Doha", "Muscat"] * 3 + ["Dubai"]})
+    assert optimized_schema(df, max_enum_categories=0) == {"flag": pl.Boolean, "city": pl.Categorical}
+
+
+@pytest.mark.parametrize(("column", "values"), [
+    ("flag", [5, 0, 1]),
+    ("answer", ["unknown", "y", "n"]),
+    ("day", ["n/a", "2020-01-01", None]),
+    ("count", [1.5, 2.0, 3.0]),
+])
+def test_reused_schema_rejects_values_outside_of_it(fitted, column, values):
+    df, schema = fitted
+    new_df = df.with_columns(pl.Series(column, values, dtype=df.schema[column]))
+    with pytest.raises(ValueError):
+        optimize_dtypes(new_df, dtypes=schema)
+    with pytest.raises(pl.exceptions.InvalidOperationError):
+        optimize_dtypes(new_df.lazy(), dtypes=schema).collect()
+
+
+def test_reused_schema_converts_fitting_data(fitted):
+    df, schema = fitted
+    new_df = pl.DataFrame({"flag": [1, None], "zeros": [3, 0], "answer": ["YES", "no"], "day": ["2021-03-04", None], "count": [7.0, None]})
+    assert optimize_dtypes(new_df, dtypes=schema).to_dict(as_series=False) == {
+        "flag": [True, None], "zeros": [3, 0], "answer": [True, False], "day": [date(2021, 3, 4), None], "count": [7, None],
+    }
+
+
+def test_high_cardinality_strings_skip_exact_categories():
+    rng = np.random.default_rng(0)
+    df = pl.DataFrame({"id": [f"id_{i}" for i in rng.permutation(100_000)], "segment": rng.choice(["a", "b"], 100_000)})
+    assert optimized_schema(df) == {"segment": pl.Enum(["a", "b"])}
+
+
+@pytest.mark.parametrize("kind, tolerance", [("standard", 1e-9), ("robust", 5e-3)])
+def test_partial_fit_matches_fit(kind, tolerance):
+    rng = np.random.default_rng(0)
+    df = pl.DataFrame({"a": rng.normal(5, 2, 100_000), "b": rng.lognormal(0, 1, 100_000)})
+    exact, chunked = NumericalScaler(kind=kind), NumericalScaler(kind=kind)
+    exact.fit(df)
+    for start in range(0, df.height, 10_000):
+        chunked.partial_fit(df[start: start + 10_000])
+    np.testing.assert_allclose(chunked.center_, exact.center_, rtol=tolerance)
+    np.testing.assert_allclose(chunked.scale_, exact.scale_, rtol=tolerance)
+
+
+def test_partial_fit_after_fit_raises():
+    scaler = NumericalScaler(kind="standard")
+    scaler.fit(pl.DataFrame({"a": [1.0, 2.0, 3.0]}))
+    with pytest.raises(RuntimeError, match="partial_fit"):
+        scaler.partial_fit(pl.DataFrame({"a": [4.0]}))
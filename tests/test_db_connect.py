@@ -0,0 +1,72 @@
+import sqlite3
+from decimal import Decimal
+import polars as pl
+import pytest
+from db_connect import fetch_batches, fetch_to_parquet, QueryCache
+
+
+def connect(*values) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (v)")  # no declared type: sqlite keeps every value's own type
+    conn.executemany("INSERT INTO t VALUES (?)", [(value,) for value in values])
+    return conn
+
+
+def fetch(conn, batch_size: int = 2, **kwargs) -> list:
+    return pl.concat(fetch_batches("SELECT v FROM t", conn, batch_size, **kwargs))["v"].to_list()
+
+
+def test_null_first_batch_takes_later_dtype(tmp_path):
+    conn = connect(None, None, 1, 2, None)
+    assert fetch(conn) == [None, None, 1, 2, None]
+
+    path = str(tmp_path / "t.parquet")
+    assert fetch_to_parquet("SELECT v FROM t", conn, path, batch_size=2) == 5
+    assert pl.read_parquet(path)["v"].dtype == pl.Int64
+
+
+def test_lookahead_promotes_to_lossless_supertype():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (v, w)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(1, None), (2, None), (1.5, "a")])  # "w" keeps the first batch held back
+    frame = pl.concat(fetch_batches("SELECT v, w FROM t", conn, 2))
+    assert frame["v"].to_list() == [1.0, 2.0, 1.5] and frame["w"].to_list() == [None, None, "a"]
+
+
+@pytest.mark.parametrize("values", [(1, 2, 1.5), (None, None, "a", "b", 7)], ids=["float_after_int", "int_after_string"])
+def test_mismatching_later_batch_raises(values):
+    with pytest.raises(TypeError, match="schema_overrides"):
+        fetch(connect(*values))
+
+
+def test_schema_overrides_keep_mixed_values():
+    assert fetch(connect(1, 2, 1.5), schema_overrides={"v": pl.Float64}) == [1.0, 2.0, 1.5]
+
+
+def test_decimals_keep_their_scale():
+    conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+    sqlite3.register_converter("DEC", lambda raw: Decimal(raw.decode()))
+    conn.execute("CREATE TABLE t (v DEC)")
+    conn.executemany("INSERT INTO t VALUES (?)", [("1.5",), ("2.5",), ("1.25",)])
+    with pytest.raises(TypeError, match="schema_overrides"):  # "1.25" doesn't fit the Decimal(scale=1) fixed by the first batch
+        fetch(conn)
+    assert fetch(conn, batch_size=3) == [Decimal("1.5"), Decimal("2.5"), Decimal("1.25")]
+
+
+def test_query_cache_keys_on_fetch_options(tmp_path):
+    cache, conn = QueryCache(str(tmp_path)), connect(1, 2, 3)
+    optimized = cache.fetch("SELECT v FROM t", conn, conn_params={}, auto_reconnect=False)
+    raw = cache.fetch("SELECT v FROM t", conn, conn_params={}, auto_reconnect=False, optimize_df=False)
+    assert optimized.collect()["v"].dtype == pl.UInt8 and raw.collect()["v"].dtype == pl.Int64
+
+    conn.close()  # hits never touch the connection
+    assert cache.fetch("SELECT v  FROM t;", conn, conn_params={}, auto_reconnect=False).collect()["v"].to_list() == [1, 2, 3]
+
+
+def test_query_cache_frames_outlive_their_files(tmp_path):
+    cache, conn = QueryCache(str(tmp_path)), connect(1, 2, 3)
+    missed = cache.fetch("SELECT v FROM t", conn, conn_params={}, auto_reconnect=False)
+    hit = cache.fetch("SELECT v FROM t", conn, conn_params={}, auto_reconnect=False)
+    cache.fetch("SELECT v FROM t", conn, conn_params={}, auto_reconnect=False, refresh=True)
+    cache.invalidate()
+    assert missed.collect()["v"].to_list() == hit.collect()["v"].to_list() == [1, 2, 3]
@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+HEAVY_MODULES = ("polars", "sklearn", "statsmodels", "panel")
+
+
+def loaded_after(statement: str) -> list[str]:
+    # Runs "statement" in a fresh interpreter (this one has long imported everything) and returns the heavy modules it loaded
+    probe = f"import json, sys\n{statement}\nprint(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}} & set({HEAVY_MODULES!r}))))"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parents[1])
+    return json.loads(result.stdout)
+
+
+def test_importing_the_package_loads_no_heavy_module():
+    assert loaded_after("import my_utils") == []
+
+
+@pytest.mark.parametrize("statement, allowed", [("from my_utils import clean_columns", ["polars"]),
+                                                ("from my_utils import optimize_dtypes", ["polars"])])
+def test_objects_load_only_their_own_dependencies(statement, allowed):
+    assert loaded_after(statement) == allowed
+
+
+def test_dir_lists_the_public_api_only():
+    import my_utils
+    assert dir(my_utils) == sorted(my_utils.__all__)
@@ -0,0 +1,29 @@
+import polars as pl
+import pytest
+from my_utils.pipeline import Pipeline
+
+
+@pytest.fixture
+def pipeline() -> Pipeline:
+    train_df = pl.DataFrame({"Flag": ["Y", "N", "N", "Y"], "City": ["Dubai", "Doha", "Dubai", "Dubai"], "Amount": [1.5, 2.5, 3.5, 4.5]})
+    pipeline = Pipeline(drop=False, scaler=None, encode_nulls=None)
+    pipeline.fit(train_df)
+    return pipeline
+
+
+def test_flags_become_boolean(pipeline):
+    assert pipeline.dtypes_["flag"] == pl.Boolean
+    assert pipeline.dtypes_["city"] == pl.Categorical
+
+
+def test_transform_applies_fitted_dtypes(pipeline):
+    new_df = pl.DataFrame({"Flag": ["n", None], "City": ["Muscat", "Doha"], "Amount": [1.0, 2.0]})
+    assert pipeline.transform(new_df)["flag"].to_list() == [False, None]
+
+
+def test_transform_rejects_values_outside_fitted_dtypes(pipeline):
+    new_df = pl.DataFrame({"Flag": ["maybe", "Y"], "City": ["Dubai", "Doha"], "Amount": [1.0, 2.0]})
+    with pytest.raises(ValueError):
+        pipeline.transform(new_df)
+    with pytest.raises(pl.exceptions.InvalidOperationError):
+        pipeline.transform(new_df.lazy()).collect()
@@ -0,0 +1,23 @@
+from datetime import date, timedelta
+import pytest
+from my_utils.predictors import ChurnTracker
+
+
+@pytest.fixture
+def tracker() -> ChurnTracker:
+    tracker = ChurnTracker(window=2)
+    for days in (0, 3, 10, 12, 20):  # the two oldest differences end up in buckets
+        tracker.update("a", date(2024, 1, 1) + timedelta(days=days))
+    return tracker
+
+
+def test_same_day_event_is_aggregated(tracker):
+    before = tracker.predict("a", 7)
+    tracker.update("a", date(2024, 1, 21))
+    assert tracker.predict("a", 7) == before
+
+
+@pytest.mark.parametrize("days", [12, 3, 5], ids=["in_window", "in_buckets", "unseen"])
+def test_older_events_always_raise(tracker, days):
+    with pytest.raises(ValueError, match="out of order"):
+        tracker.update("a", date(2024, 1, 1) + timedelta(days=days))
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from my_utils.serialization import save_fitted, load_fitted
+from my_utils.tree_optimize import CompiledForest
+
+
+@pytest.fixture
+def classifier() -> tuple[RandomForestClassifier, np.ndarray]:
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(300, 4)).astype(np.float32)
+    labels = np.where(x[:, 0] > 0, "churned", "active").astype(object)  # object labels, as from a pandas column
+    return RandomForestClassifier(10, max_depth=5, random_state=0).fit(x, labels), x
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+@pytest.mark.parametrize("mmap", [False, True])
+def test_object_classes_round_trip(tmp_path, classifier, compiled, mmap):
+    model, x = classifier
+    obj = CompiledForest(model) if compiled else model
+    save_fitted(obj, str(tmp_path / "model.bin"))
+    loaded = load_fitted(str(tmp_path / "model.bin"), mmap=mmap)
+    assert loaded.classes_.dtype == object and loaded.classes_.tolist() == ["active", "churned"]
+    assert (loaded.predict(x) == model.predict(x)).all()
+
+
+def test_mixed_object_classes_raise_at_save_time(tmp_path, classifier):
+    model, x = classifier
+    model.classes_ = np.array(["active", 1], dtype=object)
+    with pytest.raises(TypeError, match="classes"):
+        save_fitted(model, str(tmp_path / "model.bin"))
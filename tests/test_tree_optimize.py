@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from my_utils.tree_optimize import CompiledForest, optimize_trees
+
+
+@pytest.fixture
+def data() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(600, 6)).astype(np.float32)
+    x[rng.random(x.shape) < 0.05] = np.nan  # missing values are routed like sklearn does
+    return x, np.nan_to_num(x[:, 0]) * 2 + np.nan_to_num(x[:, 1]) ** 2
+
+
+@pytest.mark.parametrize("max_depth", [3, None])
+def test_compiled_regressor_matches_sklearn(data, max_depth):
+    x, y = data
+    model = RandomForestRegressor(20, max_depth=max_depth, random_state=0).fit(x[:400], y[:400])
+    np.testing.assert_allclose(CompiledForest(model).predict(x[400:], batch_size=64), model.predict(x[400:]), rtol=1e-12)
+
+
+def test_compiled_classifier_matches_sklearn(data):
+    x, y = data
+    labels = np.where(y > 0, "up", "down").astype(object)  # object labels, as from a pandas column
+    model = RandomForestClassifier(20, random_state=0).fit(x[:400], labels[:400])
+    compiled = CompiledForest(model)
+    np.testing.assert_allclose(compiled.predict_proba(x[400:]), model.predict_proba(x[400:]), rtol=1e-12)
+    assert (compiled.predict(x[400:]) == model.predict(x[400:])).all()
+
+
+def test_optimize_trees_prunes_and_compiles_on_request(data):
+    x, y = data
+    model = RandomForestRegressor(10, max_depth=4, random_state=0).fit(x, y)
+    assert optimize_trees(x, y, model) is model and 2 <= len(model.estimators_) <= 10
+
+    with pytest.warns(DeprecationWarning, match="hummingnize"):
+        compiled = optimize_trees(x, y, RandomForestRegressor(10, max_depth=4, random_state=0).fit(x, y), hummingnize=True)
+    assert isinstance(compiled, CompiledForest)